@@ -0,0 +1,233 @@
+import hashlib
+import io
+import json
+import mmap
+import os
+import struct
+import wave
+from array import array
+from typing import Dict, Optional, Tuple
+import pygame
+from settings import IMAGES_DIR, SOUNDS_DIR, ASSET_BUNDLE_PATH
+
+# Prebuilt asset bundle: every sprite packed into one RGBA atlas plus every sound as
+# raw PCM, behind a JSON manifest, in a single file that is memory-mapped at startup.
+#
+#   magic (8) | manifest length (u32 LE) | manifest JSON | pad to 16 | atlas | pcm...
+#
+# Blob offsets in the manifest are relative to the aligned start of the data.
+#
+# The manifest records a size/mtime signature and a SHA-256 of each source file.
+# A bundle whose sources changed (by content) is stale. The bundle is a local
+# build artifact, not tracked in git: open_bundle builds a missing or stale one
+# from the sources, and the caller falls back to loading the individual files
+# only when that fails.
+
+MAGIC = b"SIBNDL01"
+ATLAS_MAX_WIDTH = 256
+ATLAS_PADDING = 1
+# PCM keeps each source WAV's rate and sample format; 16-bit mono is widened to
+# stereo like pygame's default mixer. A sound whose format matches the running
+# mixer wraps its bytes directly (Sound(buffer=...)); any other is re-wrapped as
+# an in-memory WAV so SDL converts it (AssetBundle.sound)
+PCM_CHANNELS = 2
+
+IMAGE_FILES = {
+    "player": "player.png",
+    "enemy": "enemy.png",
+    "bullet": "bullet.png",
+    "enemy_bullet": "enemy_bullet.png",
+    "explosion_1": "explosion_1.png",
+    "explosion_2": "explosion_2.png",
+}
+SOUND_FILES = {
+    "shoot": "shoot.wav",
+    "hit": "hit.wav",
+    "explosion": "explosion.wav",
+    "game_over": "game_over.wav",
+}
+
+
+def _sources() -> Dict[str, str]:
+    files = {f"images/{f}": os.path.join(IMAGES_DIR, f) for f in IMAGE_FILES.values()}
+    files.update({f"sounds/{f}": os.path.join(SOUNDS_DIR, f) for f in SOUND_FILES.values()})
+    return files
+
+
+def _file_hash(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _stat_sig(path: str) -> Tuple[int, int]:
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def _pack(sizes: Dict[str, Tuple[int, int]]) -> Tuple[Dict[str, Tuple[int, int, int, int]], int, int]:
+    # Shelf packing, tallest first
+    frames = {}
+    x = y = shelf_h = width = 0
+    for name in sorted(sizes, key=lambda n: (-sizes[n][1], n)):
+        w, h = sizes[name]
+        if x and x + w > ATLAS_MAX_WIDTH:
+            x, y, shelf_h = 0, y + shelf_h + ATLAS_PADDING, 0
+        frames[name] = (x, y, w, h)
+        x += w + ATLAS_PADDING
+        shelf_h = max(shelf_h, h)
+        width = max(width, x)
+    return frames, width, y + shelf_h
+
+
+def _read_pcm(path: str) -> Tuple[bytes, int, int, int]:
+    # Returns (pcm, frequency, format, channels), widening 16-bit mono to stereo
+    with wave.open(path, "rb") as wf:
+        channels, width, rate = wf.getnchannels(), wf.getsampwidth(), wf.getframerate()
+        frames = wf.readframes(wf.getnframes())
+    fmt = {1: 8, 2: -16}.get(width, width * -8)
+    if width == 2 and channels == 1 and PCM_CHANNELS == 2:
+        mono = array("h", frames)
+        stereo = array("h", bytes(len(frames) * 2))
+        stereo[0::2] = mono
+        stereo[1::2] = mono
+        return stereo.tobytes(), rate, fmt, 2
+    return frames, rate, fmt, channels
+
+
+def _align(n: int) -> int:
+    return (n + 15) & ~15
+
+
+def build_bundle(path: str = ASSET_BUNDLE_PATH) -> str:
+    sources = _sources()
+    images = {name: pygame.image.load(os.path.join(IMAGES_DIR, f)) for name, f in IMAGE_FILES.items()}
+    frames, aw, ah = _pack({name: img.get_size() for name, img in images.items()})
+    atlas = pygame.Surface((aw, ah), pygame.SRCALPHA)
+    for name, (x, y, w, h) in frames.items():
+        # MAX onto the cleared atlas copies RGBA verbatim instead of alpha-blending
+        atlas.blit(images[name], (x, y), special_flags=pygame.BLEND_RGBA_MAX)
+
+    blobs = [pygame.image.tostring(atlas, "RGBA")]
+    sounds = {}
+    for name, f in SOUND_FILES.items():
+        pcm, freq, fmt, channels = _read_pcm(os.path.join(SOUNDS_DIR, f))
+        sounds[name] = {"blob": len(blobs), "frequency": freq, "format": fmt, "channels": channels}
+        blobs.append(pcm)
+
+    # Blob offsets are relative to the data section, which starts 16-byte aligned
+    table, offset = [], 0
+    for blob in blobs:
+        table.append([offset, len(blob)])
+        offset += len(blob)
+    manifest = {
+        "sources": {key: {"sig": list(_stat_sig(p)), "sha256": _file_hash(p)} for key, p in sources.items()},
+        "atlas": {"size": [aw, ah], "blob": 0},
+        "frames": frames,
+        "sounds": sounds,
+        "blobs": table,
+    }
+    body = json.dumps(manifest).encode()
+    head = MAGIC + struct.pack("<I", len(body)) + body
+    head += b"\0" * (_align(len(head)) - len(head))
+    # Written aside and moved into place, so a reader (or another process building
+    # the same bundle) never maps a half-written file
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(head)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp, path)
+    return path
+
+
+class AssetBundle:
+    def __init__(self, path: str) -> None:
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:8] != MAGIC:
+            self.close()
+            raise ValueError("not an asset bundle")
+        (length,) = struct.unpack_from("<I", self._mm, 8)
+        self.manifest = json.loads(self._mm[12:12 + length])
+        self._data = _align(12 + length)
+        self._atlas: Optional[pygame.Surface] = None
+
+    def is_fresh(self) -> bool:
+        sources = _sources()
+        if set(sources) != set(self.manifest["sources"]):
+            return False
+        for key, src in self.manifest["sources"].items():
+            path = sources[key]
+            if not os.path.exists(path):
+                return False
+            # Cheap stat check first; only hash files whose size/mtime moved
+            if list(_stat_sig(path)) != src["sig"] and _file_hash(path) != src["sha256"]:
+                return False
+        return True
+
+    def _blob(self, index: int) -> memoryview:
+        offset, size = self.manifest["blobs"][index]
+        start = self._data + offset
+        return memoryview(self._mm)[start:start + size]
+
+    def atlas(self) -> pygame.Surface:
+        if self._atlas is None:
+            w, h = self.manifest["atlas"]["size"]
+            atlas = pygame.image.frombuffer(self._blob(self.manifest["atlas"]["blob"]), (w, h), "RGBA")
+            # convert_alpha copies into display format, after which the mapping is not referenced
+            self._atlas = atlas.convert_alpha() if pygame.display.get_surface() is not None else atlas.copy()
+        return self._atlas
+
+    def images(self) -> Dict[str, pygame.Surface]:
+        atlas = self.atlas()
+        return {name: atlas.subsurface(pygame.Rect(rect)) for name, rect in self.manifest["frames"].items()}
+
+    def sound(self, name: str):
+        info = self.manifest["sounds"].get(name)
+        mixer = pygame.mixer.get_init()
+        if info is None or not mixer:
+            return None
+        pcm = self._blob(info["blob"])
+        if mixer == (info["frequency"], info["format"], info["channels"]):
+            return pygame.mixer.Sound(buffer=pcm)
+        # Mixer runs another format: let SDL convert through an in-memory WAV
+        bio = io.BytesIO()
+        with wave.open(bio, "wb") as wf:
+            wf.setnchannels(info["channels"])
+            wf.setsampwidth(abs(info["format"]) // 8)
+            wf.setframerate(info["frequency"])
+            wf.writeframes(pcm)
+        bio.seek(0)
+        return pygame.mixer.Sound(file=bio)
+
+    def close(self) -> None:
+        self._mm.close()
+        self._file.close()
+
+
+def _open_fresh(path: str) -> Optional[AssetBundle]:
+    # A fresh bundle, or None when it is missing, unreadable or stale
+    if not os.path.exists(path):
+        return None
+    try:
+        bundle = AssetBundle(path)
+    except (OSError, ValueError):
+        return None
+    if not bundle.is_fresh():
+        bundle.close()
+        return None
+    return bundle
+
+
+def open_bundle(path: str = ASSET_BUNDLE_PATH, build: bool = True) -> Optional[AssetBundle]:
+    # A fresh bundle; with `build`, a missing or stale one is (re)built first when
+    # every source file is there. None when there is still none to use.
+    bundle = _open_fresh(path)
+    if bundle is None and build and all(os.path.exists(p) for p in _sources().values()):
+        try:
+            build_bundle(path)
+        except Exception:
+            # Unreadable sources or a read-only directory: load the files one by one
+            return None
+        bundle = _open_fresh(path)
+    return bundle
@@ -1,15 +1,34 @@
 import os
+import threading
+import time
 import pygame
-from typing import Tuple
-from settings import IMAGES_DIR, SOUNDS_DIR, COLOR_GREEN, COLOR_RED, COLOR_YELLOW
+from typing import Callable, Dict, Optional, Tuple
+from settings import IMAGES_DIR, SOUNDS_DIR, COLOR_GREEN, COLOR_RED, COLOR_YELLOW, HORDE_ENEMY_SIZE
+from asset_bundle import AssetBundle, IMAGE_FILES, SOUND_FILES, open_bundle
+
+
+def build_masks(images: Dict[str, pygame.Surface]) -> Dict[str, pygame.mask.Mask]:
+    # Opaque-pixel masks for the narrow phase of collision checks, one per image
+    return {name: pygame.mask.from_surface(image) for name, image in images.items()}
 
 
 class Assets:
     def __init__(self) -> None:
         self.images = {}
         self.sounds = {}
+        # Collision masks, built with the images
+        self.masks: Dict[str, pygame.mask.Mask] = {}
+        # Opened on first load; False once found missing or stale
+        self._bundle: Optional[AssetBundle] = None
+        self._bundle_checked = False
 
     def load(self) -> None:
+        self.init_mixer()
+        self.load_images()
+        self.load_sounds()
+
+    @staticmethod
+    def init_mixer() -> None:
         # Ensure mixer initialized; ignore if fails (no audio device)
         try:
             if not pygame.mixer.get_init():
@@ -17,27 +36,65 @@ class Assets:
         except Exception:
             pass
 
-        self.images["player"] = self._load_image("player.png", fallback=self._make_player_surface())
-        self.images["enemy"] = self._load_image("enemy.png", fallback=self._make_enemy_surface())
-        self.images["bullet"] = self._load_image("bullet.png", fallback=self._make_bullet_surface())
-        self.images["enemy_bullet"] = self._load_image("enemy_bullet.png", fallback=self._make_enemy_bullet_surface())
-        self.images["explosion_1"] = self._load_image("explosion_1.png", fallback=self._make_explosion_surface((255, 180, 60)))
-        self.images["explosion_2"] = self._load_image("explosion_2.png", fallback=self._make_explosion_surface((255, 120, 60)))
+    def bundle(self) -> Optional[AssetBundle]:
+        # One mmap'd file instead of a open + decode per asset; stale bundles are ignored
+        if not self._bundle_checked:
+            self._bundle_checked = True
+            self._bundle = open_bundle()
+        return self._bundle
+
+    def load_images(self) -> None:
+        bundle = self.bundle()
+        if bundle is not None:
+            self.images.update(bundle.images())
+        else:
+            self._load_image_files()
+        # Horde mode's enemies, scaled down so thousands fit on screen
+        self.images["horde_enemy"] = pygame.transform.smoothscale(self.images["enemy"], HORDE_ENEMY_SIZE)
+        self.masks = build_masks(self.images)
 
-        self.sounds["shoot"] = self._load_sound("shoot.wav")
-        self.sounds["hit"] = self._load_sound("hit.wav")
-        self.sounds["explosion"] = self._load_sound("explosion.wav")
-        self.sounds["game_over"] = self._load_sound("game_over.wav")
+    def _load_image_files(self) -> None:
+        fallbacks = {
+            "player": self._make_player_surface,
+            "enemy": self._make_enemy_surface,
+            "bullet": self._make_bullet_surface,
+            "enemy_bullet": self._make_enemy_bullet_surface,
+            "explosion_1": lambda: self._make_explosion_surface((255, 180, 60)),
+            "explosion_2": lambda: self._make_explosion_surface((255, 120, 60)),
+        }
+        for name, filename in IMAGE_FILES.items():
+            image = self._load_image(filename)
+            self.images[name] = image if image is not None else fallbacks[name]()
 
-    def _load_image(self, filename: str, fallback: pygame.Surface) -> pygame.Surface:
+    def load_sounds(self) -> None:
+        self.sounds.update(self.read_sounds())
+
+    def read_sounds(self) -> Dict[str, Optional[pygame.mixer.Sound]]:
+        # Decodes without touching self.sounds, so it can run off the main thread
+        bundle = self.bundle()
+        sounds = {}
+        for name, filename in SOUND_FILES.items():
+            sound = None
+            if bundle is not None:
+                try:
+                    sound = bundle.sound(name)
+                except Exception:
+                    pass
+            sounds[name] = sound if sound is not None else self._load_sound(filename)
+        return sounds
+
+    def _load_image(self, filename: str) -> Optional[pygame.Surface]:
         path = os.path.join(IMAGES_DIR, filename)
         try:
             if os.path.exists(path):
-                image = pygame.image.load(path).convert_alpha()
+                image = pygame.image.load(path)
+                # convert_alpha needs a display; headless runs keep the decoded surface
+                if pygame.display.get_surface() is not None:
+                    image = image.convert_alpha()
                 return image
         except Exception:
             pass
-        return fallback
+        return None
 
     def _load_sound(self, filename: str):
         path = os.path.join(SOUNDS_DIR, filename)
@@ -78,3 +135,38 @@ class Assets:
         return surf
 
 
+class BackgroundTask:
+    # Runs fn on a daemon thread. The main thread checks done() each frame and takes
+    # result (or error) from there, so shared state is only ever touched by one side.
+
+    def __init__(self, fn: Callable[[], object]) -> None:
+        self._fn = fn
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="asset-loader", daemon=True)
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.elapsed_ms = 0.0
+
+    def start(self) -> "BackgroundTask":
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        start = time.perf_counter()
+        try:
+            self.result = self._fn()
+        except BaseException as exc:
+            self.error = exc
+        self.elapsed_ms = (time.perf_counter() - start) * 1000.0
+        self._done.set()
+
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self):
+        self._done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
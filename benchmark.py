@@ -0,0 +1,309 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+# Headless by default; set SDL_VIDEODRIVER yourself to measure a real display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+from settings import SCREEN_WIDTH, SCREEN_HEIGHT, COLOR_BG, SIM_HZ, ENEMY_BULLET_SPEED, BULLET_SPEED, BULLET_POOL_CAPACITY
+from assets_loader import Assets
+from effects import BURST_ENEMY
+from entities import BulletPool
+from frame_stats import FrameStats, SIM_PHASES, percentile
+
+
+def _time_per_call(fn: Callable[[], None], repeat: int) -> float:
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def bench_blits(counts: List[int], repeat: int) -> None:
+    # Per-sprite Surface.blit vs one Surface.blits (and fblits when available) call
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    assets = Assets()
+    assets.load_images()
+    images = [assets.images[k] for k in ("enemy", "bullet", "enemy_bullet", "explosion_1")]
+    rng = random.Random(0)
+    fblits = getattr(screen, "fblits", None)
+    # Every variant clears the screen first; report times net of that clear
+    t_fill = _time_per_call(lambda: screen.fill(COLOR_BG), repeat)
+    print(f"{'sprites':>8} {'blit loop':>12} {'blits':>12} {'fblits':>12} {'speedup':>8}")
+    for n in counts:
+        items = [(rng.choice(images), (rng.randrange(SCREEN_WIDTH), rng.randrange(SCREEN_HEIGHT))) for _ in range(n)]
+
+        def loop() -> None:
+            screen.fill(COLOR_BG)
+            blit = screen.blit
+            for img, pos in items:
+                blit(img, pos)
+
+        def batched() -> None:
+            screen.fill(COLOR_BG)
+            screen.blits(items, doreturn=False)
+
+        def fast() -> None:
+            screen.fill(COLOR_BG)
+            fblits(items)
+
+        t_loop = _time_per_call(loop, repeat) - t_fill
+        t_blits = _time_per_call(batched, repeat) - t_fill
+        t_fblits = _time_per_call(fast, repeat) - t_fill if fblits else None
+        best = min(t for t in (t_blits, t_fblits) if t is not None)
+        fb = f"{t_fblits * 1e6:10.0f}us" if t_fblits is not None else f"{'n/a':>12}"
+        print(f"{n:>8} {t_loop * 1e6:10.0f}us {t_blits * 1e6:10.0f}us {fb} {t_loop / best:7.2f}x")
+    pygame.quit()
+
+
+def bench_snapshot(counts: List[int], repeat: int, backend: str, budget_ms: float) -> int:
+    # save_state, load_state and RewindBuffer.push with N live bullets; the game
+    # takes one snapshot per simulation step, so each must fit well inside a frame.
+    # Loads restore the previous step over the current one, like a rewind.
+    from simulation import Simulation
+    from snapshot import RewindBuffer, save_state, load_state
+    if backend == "numpy":
+        from soa import ArraySimulation as cls
+    else:
+        cls = Simulation
+    sim = cls.headless(seed=0)
+    w, h = sim.enemy_bullet_image.get_size()
+    rng = random.Random(0)
+    over = []
+    print(f"{'bullets':>8} {'save':>10} {'load':>10} {'push':>10} {'bytes':>8}")
+    for n in counts:
+        sim.bullets = BulletPool(capacity=max(n, BULLET_POOL_CAPACITY)) if backend == "objects" else sim._new_bullets()
+        for i in range(n):
+            sim.bullets.spawn(rng.randrange(SCREEN_WIDTH), rng.randrange(SCREEN_HEIGHT), w, h,
+                              BULLET_SPEED if i % 2 else ENEMY_BULLET_SPEED, i % 2 == 1)
+        before = save_state(sim)
+        # One step on: every bullet moves and a few hit something
+        for i in range(0, n, 50):
+            if backend == "objects":
+                sim.bullets.despawn(sim.bullets[i])
+            else:
+                sim.bullets.alive[i] = False
+        sim.bullets.update()
+        after = save_state(sim)
+        rewind = RewindBuffer()
+        rewind.push(before)
+
+        def load() -> float:
+            load_state(sim, after)
+            t0 = time.perf_counter()
+            load_state(sim, before)
+            return time.perf_counter() - t0
+
+        load()
+        times = {
+            "save": _time_per_call(lambda: save_state(sim), repeat),
+            "load": sum(load() for _ in range(repeat)) / repeat,
+            "push": _time_per_call(lambda: rewind.push(after), repeat),
+        }
+        cells = " ".join(f"{t * 1000:8.3f}ms" for t in times.values())
+        print(f"{n:>8} {cells} {len(before):>8}")
+        over += [f"{key} with {n} bullets: {t * 1000:.3f} ms" for key, t in times.items() if t * 1000 > budget_ms]
+    for line in over:
+        print(f"OVER BUDGET ({budget_ms} ms): {line}")
+    return 1 if over else 0
+
+
+# Each scenario drives a real Game (dummy video/audio) for a fixed number of frames
+# with a seeded simulation and scripted input, timing Game.update and Game.draw
+# separately; the simulation phases inside update are split out via FrameStats.
+# The player cannot die, so every frame carries the same kind of load.
+
+STORM_BULLETS = 10000
+EXPLOSIONS_PER_FRAME = 40
+
+
+def _keys(frame: int) -> Dict[int, bool]:
+    # Always firing, sweeping left and right every second
+    keys = defaultdict(bool)
+    keys[pygame.K_SPACE] = True
+    keys[pygame.K_LEFT if (frame // SIM_HZ) % 2 else pygame.K_RIGHT] = True
+    return keys
+
+
+def _top_up_storm(game, rng: random.Random) -> None:
+    # Keep STORM_BULLETS alive: half falling enemy shots, half rising player shots
+    bullets = game.sim.bullets
+    w, h = game.sim.enemy_bullet_image.get_size()
+    while len(bullets) < STORM_BULLETS:
+        if rng.random() < 0.5:
+            bullets.spawn(rng.randrange(SCREEN_WIDTH), rng.randrange(SCREEN_HEIGHT // 2), w, h, ENEMY_BULLET_SPEED, False)
+        else:
+            bullets.spawn(rng.randrange(SCREEN_WIDTH), rng.randrange(SCREEN_HEIGHT // 2, SCREEN_HEIGHT), w, h, BULLET_SPEED, True)
+
+
+def _add_explosions(game, rng: random.Random) -> None:
+    # High-level bursts (full debris), enough to keep the particle cap saturated
+    particles, tick = game.particles, game.sim.tick
+    for _ in range(EXPLOSIONS_PER_FRAME):
+        particles.burst(BURST_ENEMY, (rng.randrange(SCREEN_WIDTH), rng.randrange(SCREEN_HEIGHT)), tick, 20)
+
+
+SCENARIOS = {
+    # name: (state, formation rows x cols, per-frame hook run outside the timings, horde mode)
+    "formation_5x10": ("playing", (5, 10), None, False),
+    "formation_50x40": ("playing", (50, 40), None, False),
+    "bullet_storm_10k": ("playing", (5, 10), _top_up_storm, False),
+    "explosion_waves": ("playing", (5, 10), _add_explosions, False),
+    # Endless waves from settings.HORDE_WAVES (thousands of enemies on screen)
+    "horde": ("playing", (5, 10), None, True),
+    "menu_idle": ("menu", (5, 10), None, False),
+}
+
+
+def _make_game(state: str, rows: int, cols: int, backend: str, seed: int, horde: bool = False):
+    from game import Game
+    from simulation import Simulation
+    # Startup reports and the first (cache-filling) frame stay out of the results
+    with contextlib.redirect_stdout(io.StringIO()):
+        game = Game()
+        game._finish_loading(wait=True)
+        if backend == "numpy":
+            from soa import ArraySimulation
+            game.sim = ArraySimulation(game.assets.images, "Normal", seed, rows, cols, game.assets.masks, horde)
+        else:
+            game.sim = Simulation(game.assets.images, "Normal", seed, rows, cols, game.assets.masks, horde)
+        game.reset(seed=seed)
+        game.state = state
+        game.draw()
+    # Snapshot cost has its own benchmark (`snapshot`); the scenarios time the game
+    game.rewind = None
+    sim = game.sim
+    sim._end_game = lambda: None
+    if backend == "objects":
+        # Room for the storm; the array backend grows on demand
+        sim.bullets = BulletPool(capacity=STORM_BULLETS * 2)
+    return game
+
+
+def run_scenario(name: str, frames: int, backend: str = "objects", seed: int = 0) -> Dict:
+    state, (rows, cols), hook, horde = SCENARIOS[name]
+    game = _make_game(state, rows, cols, backend, seed, horde)
+    rng = random.Random(seed)
+    stats = FrameStats(capacity=frames)
+    stats.enabled = True
+    stats.attach(game.sim, SIM_PHASES)
+    update_ms: List[float] = []
+    draw_ms: List[float] = []
+    clock = time.perf_counter
+    step_ms = 1000 // SIM_HZ
+    for frame in range(frames):
+        if hook is not None:
+            hook(game, rng)
+        stats.begin_frame()
+        if state == "playing":
+            t0 = clock()
+            game.update(frame * step_ms, _keys(frame))
+            update_ms.append((clock() - t0) * 1000.0)
+        t0 = clock()
+        game.draw()
+        draw_ms.append((clock() - t0) * 1000.0)
+        stats.end_frame(0, len(game.sim.bullets), len(game.particles), 1)
+    stats.detach()
+    phases = stats.summary()
+    result = {"frames": frames, "backend": backend}
+    for key, values in (("update", update_ms), ("draw", draw_ms)):
+        if values:
+            result[key] = {"fps": len(values) / (sum(values) / 1000.0), "p99_ms": percentile(values, 99)}
+    for phase in ("enemies", "collisions"):
+        if update_ms:
+            result[phase] = {"p50_ms": phases[phase]["p50"], "p99_ms": phases[phase]["p99"]}
+    return result
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float, slack_ms: float) -> List[str]:
+    # Mean frame time (1000 / fps) and p99 may each grow by `tolerance` (relative)
+    # plus `slack_ms`, which keeps sub-millisecond jitter from failing the run
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for key in ("update", "draw"):
+            if key not in result or key not in base:
+                continue
+            cur, ref = result[key], base[key]
+            if 1000.0 / cur["fps"] > 1000.0 / ref["fps"] * (1.0 + tolerance) + slack_ms:
+                regressions.append(f"{name} {key} fps {cur['fps']:.0f} < baseline {ref['fps']:.0f}")
+            if cur["p99_ms"] > ref["p99_ms"] * (1.0 + tolerance) + slack_ms:
+                regressions.append(f"{name} {key} p99 {cur['p99_ms']:.2f} ms > baseline {ref['p99_ms']:.2f} ms")
+    return regressions
+
+
+def bench_suite(names: List[str], frames: int, backend: str, baseline_path: Optional[str],
+                save_path: Optional[str], tolerance: float, slack_ms: float) -> int:
+    results = {}
+    print(f"{'scenario':<18} {'update fps':>11} {'p99':>8} {'draw fps':>10} {'p99':>8} {'enemies p99':>12} {'collide p99':>12}")
+    for name in names:
+        r = run_scenario(name, frames, backend)
+        results[name] = r
+        u, d = r.get("update"), r["draw"]
+        cells = [f"{u['fps']:11.0f}", f"{u['p99_ms']:6.2f}ms"] if u else [f"{'-':>11}", f"{'-':>8}"]
+        cells += [f"{d['fps']:10.0f}", f"{d['p99_ms']:6.2f}ms"]
+        if "enemies" in r:
+            cells += [f"{r['enemies']['p99_ms']:10.3f}ms", f"{r['collisions']['p99_ms']:10.3f}ms"]
+        print(f"{name:<18} " + " ".join(cells), flush=True)
+    pygame.quit()
+
+    if save_path:
+        with open(save_path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {save_path}")
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, tolerance, slack_ms)
+        for line in regressions:
+            print("REGRESSION: " + line)
+        if regressions:
+            return 1
+        print(f"No regressions beyond {tolerance:.0%} of {baseline_path}")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Rendering and simulation benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("blits", help="per-sprite blit vs batched blits")
+    p.add_argument("--counts", type=int, nargs="+", default=[50, 500, 5000])
+    p.add_argument("--repeat", type=int, default=200)
+    p = sub.add_parser("snapshot", help="snapshot save/load and rewind push times, checked against a budget")
+    p.add_argument("--counts", type=int, nargs="+", default=[0, 100, 1000, BULLET_POOL_CAPACITY])
+    p.add_argument("--repeat", type=int, default=200)
+    p.add_argument("--backend", default="objects", choices=["objects", "numpy"])
+    p.add_argument("--budget-ms", type=float, default=1.0, help="fail (exit 1) when any call takes longer")
+    p = sub.add_parser("suite", help="deterministic game scenarios, optionally checked against a baseline")
+    p.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    p.add_argument("--frames", type=int, default=600)
+    p.add_argument("--backend", default="objects", choices=["objects", "numpy"])
+    p.add_argument("--baseline", metavar="PATH", help="fail (exit 1) on regressions against this results file")
+    p.add_argument("--save", metavar="PATH", help="write results as JSON (use as a future --baseline)")
+    p.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown per metric")
+    p.add_argument("--slack-ms", type=float, default=0.25, help="allowed absolute slowdown per metric")
+    args = parser.parse_args(argv)
+    if args.command == "blits":
+        bench_blits(args.counts, args.repeat)
+    elif args.command == "snapshot":
+        return bench_snapshot(args.counts, args.repeat, args.backend, args.budget_ms)
+    elif args.command == "suite":
+        return bench_suite(args.scenarios, args.frames, args.backend, args.baseline, args.save, args.tolerance, args.slack_ms)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
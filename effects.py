@@ -1,26 +1,268 @@
+import copy
+import math
+import random
 import pygame
-from typing import List
+from typing import Dict, List, Optional, Sequence, Tuple
+from settings import SCREEN_WIDTH, SCREEN_HEIGHT, DIRTY_TILE_SIZE, SIM_HZ, PARTICLE_CAPACITY, PARTICLE_SPARKS, PARTICLE_DEBRIS_PER_LEVEL, PARTICLE_MAX_DEBRIS
 
+# Particle effects. Every particle lives in flat columns (structure of arrays) and
+# moves ballistically, so its position is a closed-form function of its age:
+#
+#   x = x0 + vx * age        y = y0 + (vy + ay * age / 2) * age
+#
+# update() therefore only culls expired particles, and draw() computes every
+# position and sprite in one vectorized pass. Sprites come from a cache built once
+# (explosion frames plus pre-tinted squares per colour and fade step), so drawing is
+# a single blits() call. NumPy is used when installed; plain lists otherwise.
+#
+# The clock is the simulation tick. A burst's particles are generated from a seed
+# derived from (kind, x, y, tick, level), so the live bursts alone are enough to
+# rebuild every particle after a rewind (see snapshot.py).
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
-class Explosion:
-    def __init__(self, frames: List[pygame.Surface], pos) -> None:
-        self.frames = frames
-        self.index = 0
-        self.rect = self.frames[0].get_rect(center=pos)
-        self.alive = True
-        self.frame_time_ms = 60
-        self.last_time = 0
+BURST_ENEMY = 0
+BURST_PLAYER = 1
 
-    def update(self, now_ms: int) -> None:
-        if now_ms - self.last_time >= self.frame_time_ms:
-            self.last_time = now_ms
-            self.index += 1
-            if self.index >= len(self.frames):
-                self.alive = False
+# Explosion sprite frames advance this often, as the old per-object Explosion did
+FLASH_FRAME_TICKS = max(1, round(60 * SIM_HZ / 1000))
+# Pre-tinted sprite per fade step: (size, alpha)
+FADE_STEPS = ((3, 255), (3, 210), (2, 150), (2, 90))
+SPARK_COLORS = ((255, 240, 160), (255, 180, 60), (255, 120, 60))
+DEBRIS_COLORS = ((230, 80, 80), (170, 50, 50))
+PLAYER_COLORS = ((80, 220, 120), (180, 200, 255), (255, 255, 255))
 
-    def draw(self, surface: pygame.Surface) -> None:
-        if self.alive and 0 <= self.index < len(self.frames):
-            frame = self.frames[self.index]
-            surface.blit(frame, self.rect)
+# name, dtype (lists hold the same values when NumPy is missing)
+_COLUMNS = (("x0", "f4"), ("y0", "f4"), ("vx", "f4"), ("vy", "f4"), ("ay", "f4"),
+            ("born", "i4"), ("death", "i4"), ("sprite", "i4"), ("frames", "i4"))
+_NEVER = 1 << 62
 
 
+def _tinted(color: Tuple[int, int, int], size: int, alpha: int) -> pygame.Surface:
+    surf = pygame.Surface((size, size), pygame.SRCALPHA)
+    surf.fill((*color, alpha))
+    return surf.convert_alpha() if pygame.display.get_surface() is not None else surf
+
+
+class ParticleSystem:
+    # Live particles are packed into [0, n) in spawn order, i.e. oldest first, so
+    # evicting the oldest when the cap is hit is a slice shift.
+
+    def __init__(self, flash_frames: Sequence[pygame.Surface], capacity: int = PARTICLE_CAPACITY,
+                 use_numpy: Optional[bool] = None) -> None:
+        self.capacity = capacity
+        self.use_numpy = np is not None if use_numpy is None else use_numpy and np is not None
+        # Sprite cache; a particle shows sprites[sprite + fade step]
+        self.sprites: List[pygame.Surface] = list(flash_frames)
+        self.flash_frames = len(flash_frames)
+        self.flash_size = flash_frames[0].get_size()
+        self._palettes: Dict[str, List[int]] = {}
+        for name, colors in (("spark", SPARK_COLORS), ("debris", DEBRIS_COLORS), ("player", PLAYER_COLORS)):
+            firsts = []
+            for color in colors:
+                firsts.append(len(self.sprites))
+                self.sprites.extend(_tinted(color, size, alpha) for size, alpha in FADE_STEPS)
+            self._palettes[name] = firsts
+        # (kind, x, y, tick, level, end tick) of bursts that still have particles
+        self.bursts: List[Tuple[int, int, int, int, int, int]] = []
+        self.evicted = 0
+        # Share of sparks and debris a burst throws, and the most bursts alive
+        # before new enemy bursts are dropped (both lowered by the frame-budget
+        # governor); the flash itself and a player's burst always show
+        self.detail = 1.0
+        self.max_bursts: Optional[int] = None
+        self.dropped = 0
+        self.n = 0
+        self._next_death = _NEVER
+        if self.use_numpy:
+            self.cols = {name: np.zeros(capacity, dtype=dtype) for name, dtype in _COLUMNS}
+            self._sprite_w = np.array([img.get_width() for img in self.sprites], dtype=np.int32)
+            self._sprite_h = np.array([img.get_height() for img in self.sprites], dtype=np.int32)
+            self._tile_cover = max(self._sprite_w.max(), self._sprite_h.max()) <= DIRTY_TILE_SIZE
+        else:
+            self.cols = {name: [] for name, _ in _COLUMNS}
+
+    def __len__(self) -> int:
+        return self.n
+
+    def clear(self) -> None:
+        self.bursts = []
+        self.n = 0
+        self._next_death = _NEVER
+        if not self.use_numpy:
+            for col in self.cols.values():
+                col.clear()
+
+    def freeze(self) -> "ParticleSystem":
+        # Copy of the live particles that draws like the original, so another
+        # thread can draw it while this one keeps updating; sprites are shared
+        frozen = copy.copy(self)
+        n = self.n
+        frozen.cols = {name: col[:n].copy() if self.use_numpy else col[:n] for name, col in self.cols.items()}
+        frozen.bursts = list(self.bursts)
+        return frozen
+
+    def burst(self, kind: int, pos, tick: int, level: int = 1) -> None:
+        if self.max_bursts is not None and kind != BURST_PLAYER and len(self.bursts) >= self.max_bursts:
+            self.dropped += 1
+            return
+        x, y = int(pos[0]), int(pos[1])
+        new, end = self._generate(kind, x, y, tick, level)
+        self.bursts.append((kind, x, y, tick, level, end))
+        self._append(new)
+
+    def restore(self, bursts: Sequence[Tuple[int, int, int, int, int]], tick: int) -> None:
+        # Rebuild the particles of (kind, x, y, tick, level) bursts as of `tick`
+        self.clear()
+        for kind, x, y, born, level in bursts:
+            new, end = self._generate(kind, x, y, born, level)
+            self.bursts.append((kind, x, y, born, level, end))
+            self._append(new)
+        self.update(tick)
+
+    def _generate(self, kind: int, x: int, y: int, tick: int, level: int) -> Tuple[Dict[str, list], int]:
+        rng = random.Random((tick * 0x9E3779B1 ^ x << 20 ^ y << 8 ^ level << 2 ^ kind) & 0xFFFFFFFFFFFF)
+        new = {name: [] for name, _ in _COLUMNS}
+        per_s = 1.0 / SIM_HZ
+
+        def add(count: int, x0, y0, vx, vy, ay: float, life, sprite, frames: int) -> None:
+            # Columns for `count` particles; scalars are repeated
+            for name, values in (("x0", x0), ("y0", y0), ("vx", vx), ("vy", vy), ("sprite", sprite)):
+                new[name].extend(values if isinstance(values, list) else [values] * count)
+            new["ay"].extend([ay] * count)
+            new["born"].extend([tick] * count)
+            new["death"].extend([tick + t for t in life])
+            new["frames"].extend([frames] * count)
+
+        def scatter(count: int, palette: str, speed: Tuple[float, float], lift: float, gravity: float,
+                    life: Tuple[float, float]) -> None:
+            # speed in px/s, gravity in px/s^2, life in seconds
+            if count <= 0:
+                return
+            rand = rng.random
+            angles = [rand() * math.tau for _ in range(count)]
+            lo, span = speed[0] * per_s, (speed[1] - speed[0]) * per_s
+            speeds = [lo + span * rand() for _ in range(count)]
+            lo, span = life[0] * SIM_HZ, (life[1] - life[0]) * SIM_HZ
+            lives = [max(1, round(lo + span * rand())) for _ in range(count)]
+            firsts = self._palettes[palette]
+            sprites = [firsts[int(rand() * len(firsts))] for _ in range(count)]
+            add(count, x, y, [math.cos(a) * v for a, v in zip(angles, speeds)],
+                [math.sin(a) * v - lift * per_s for a, v in zip(angles, speeds)],
+                gravity * per_s * per_s, lives, sprites, len(FADE_STEPS))
+
+        fw, fh = self.flash_size
+        add(1, x - fw // 2, y - fh // 2, 0.0, 0.0, 0.0, [self.flash_frames * FLASH_FRAME_TICKS], 0, self.flash_frames)
+        detail = self.detail
+        if kind == BURST_PLAYER:
+            scatter(round(PARTICLE_SPARKS * 2 * detail), "player", (40.0, 220.0), 0.0, 60.0, (0.4, 0.9))
+        else:
+            scatter(round(PARTICLE_SPARKS * detail), "spark", (60.0, 200.0), 0.0, 90.0, (0.25, 0.5))
+            debris = min(PARTICLE_MAX_DEBRIS, (level - 1) * PARTICLE_DEBRIS_PER_LEVEL)
+            scatter(round(debris * detail), "debris", (20.0, 110.0), 80.0, 400.0, (0.6, 1.2))
+        return new, max(new["death"])
+
+    def _append(self, new: Dict[str, list]) -> None:
+        k = len(new["born"])
+        cap = self.capacity
+        if k > cap:
+            new = {name: values[k - cap:] for name, values in new.items()}
+            self.evicted += k - cap
+            k = cap
+        n = self.n
+        excess = n + k - cap
+        cols = self.cols
+        if excess > 0:
+            self.evicted += excess
+        if self.use_numpy:
+            if excess > 0:
+                # Evict the oldest: shift the survivors to the front
+                for col in cols.values():
+                    col[:n - excess] = col[excess:n]
+                n -= excess
+            for name, col in cols.items():
+                col[n:n + k] = new[name]
+        else:
+            for name, col in cols.items():
+                col.extend(new[name])
+            if excess > 0:
+                for col in cols.values():
+                    del col[:excess]
+                n -= excess
+        self.n = n + k
+        self._next_death = min(self._next_death, min(new["death"]))
+
+    def update(self, tick: int) -> None:
+        if tick >= self._next_death:
+            self._cull(tick)
+        if self.bursts and self.bursts[0][5] <= tick:
+            self.bursts = [b for b in self.bursts if b[5] > tick]
+
+    def _cull(self, tick: int) -> None:
+        n = self.n
+        cols = self.cols
+        if self.use_numpy:
+            death = cols["death"][:n]
+            keep = np.flatnonzero(death > tick)
+            m = len(keep)
+            if m < n:
+                for col in cols.values():
+                    col[:m] = col[keep]
+            self._next_death = int(cols["death"][:m].min()) if m else _NEVER
+        else:
+            keep = [i for i, d in enumerate(cols["death"]) if d > tick]
+            m = len(keep)
+            if m < n:
+                for name, col in cols.items():
+                    cols[name] = [col[i] for i in keep]
+            self._next_death = min(cols["death"]) if m else _NEVER
+        self.n = m
+
+    def draw(self, renderer, now: float) -> None:
+        # One blits() call for the whole field; `now` is a tick and may be fractional
+        n = self.n
+        if not n:
+            return
+        c = self.cols
+        sprites = self.sprites
+        if not self.use_numpy:
+            renderer.blit_many(self._items(now))
+            return
+        born = c["born"][:n]
+        age = np.maximum(now - born, 0.0)
+        x = (c["x0"][:n] + c["vx"][:n] * age).astype(np.int32)
+        y = (c["y0"][:n] + (c["vy"][:n] + 0.5 * c["ay"][:n] * age) * age).astype(np.int32)
+        frames = c["frames"][:n]
+        step = np.minimum((age * frames // (c["death"][:n] - born)).astype(np.int32), frames - 1)
+        index = c["sprite"][:n] + step
+        items = list(zip(map(sprites.__getitem__, index.tolist()), zip(x.tolist(), y.tolist())))
+        renderer.blit_many(items, cover=self._cover(x, y, index) if self._tile_cover else None)
+
+    def _cover(self, x, y, index) -> List[pygame.Rect]:
+        # Dirty tiles touched by the field, so the renderer need not coalesce one
+        # rect per particle. No sprite is larger than a tile, so the tiles under
+        # each sprite's four corners cover it.
+        t = DIRTY_TILE_SIZE
+        cols, rows = (SCREEN_WIDTH + t - 1) // t, (SCREEN_HEIGHT + t - 1) // t
+        x0 = np.clip(x // t, 0, cols - 1)
+        y0 = np.clip(y // t, 0, rows - 1) * cols
+        x1 = np.clip((x + self._sprite_w[index] - 1) // t, 0, cols - 1)
+        y1 = np.clip((y + self._sprite_h[index] - 1) // t, 0, rows - 1) * cols
+        tiles = np.unique(np.concatenate((y0 + x0, y0 + x1, y1 + x0, y1 + x1)))
+        return [pygame.Rect(tile % cols * t, tile // cols * t, t, t) for tile in tiles.tolist()]
+
+    def _items(self, now: float) -> List[Tuple[pygame.Surface, Tuple[int, int]]]:
+        out = []
+        append = out.append
+        sprites = self.sprites
+        for x0, y0, vx, vy, ay, born, death, sprite, frames in zip(*self.cols.values()):
+            age = now - born
+            if age < 0:
+                age = 0.0
+            step = int(age * frames // (death - born))
+            if step >= frames:
+                step = frames - 1
+            append((sprites[sprite + step], (int(x0 + vx * age), int(y0 + (vy + 0.5 * ay * age) * age))))
+        return out
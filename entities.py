@@ -1,8 +1,10 @@
 from __future__ import annotations
 import pygame
-from dataclasses import dataclass
-from typing import List, Optional
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
 import random
+import struct
+from array import array
+from spatial import SpatialHash
 from settings import (
     SCREEN_WIDTH,
     SCREEN_HEIGHT,
@@ -19,15 +21,24 @@ from settings import (
     ENEMY_VMOVE_PIXELS,
     ENEMY_MOVE_INTERVAL_MS,
     ENEMY_SHOOT_CHANCE,
+    BULLET_POOL_CAPACITY,
 )
 
 
-@dataclass
+# A bullet's fields that never change after spawn (x, vy, w, h, from_player),
+# packed once by BulletPool.spawn so snapshots copy them as bytes
+BULLET_KEY = struct.Struct("<hbBBB")
+
+
 class Bullet:
-    rect: pygame.Rect
-    vy: int
-    from_player: bool
-    alive: bool = True
+    __slots__ = ("rect", "vy", "from_player", "alive", "key")
+
+    def __init__(self, rect: pygame.Rect, vy: int, from_player: bool, alive: bool = True) -> None:
+        self.rect = rect
+        self.vy = vy
+        self.from_player = from_player
+        self.alive = alive
+        self.key = b""
 
     def update(self) -> None:
         self.rect.y += self.vy
@@ -35,6 +46,157 @@ class Bullet:
             self.alive = False
 
 
+def _matching_run(a: bytes, ai: int, b: bytes, bi: int, limit: int) -> int:
+    # How many BULLET_KEY rows match from row ai of `a` and row bi of `b` (at most
+    # `limit`), compared in windows that double from 8 rows; in the first window
+    # that differs, the lowest set bit of the XOR of the two (as little-endian
+    # ints) is the mismatch
+    size = BULLET_KEY.size
+    run = 0
+    k = 8
+    while run < limit:
+        k = min(k, limit - run)
+        x = a[(ai + run) * size:(ai + run + k) * size]
+        y = b[(bi + run) * size:(bi + run + k) * size]
+        if x != y:
+            diff = int.from_bytes(x, "little") ^ int.from_bytes(y, "little")
+            return run + ((diff & -diff).bit_length() - 1) // (8 * size)
+        run += k
+        k *= 2
+    return limit
+
+
+class BulletPool:
+    # Fixed-capacity bullet storage. Records are allocated once and recycled through
+    # a free list; live bullets stay densely packed in spawn order, so iteration and
+    # indexing only touch live ones. despawn() is O(1): it just clears `alive`, and
+    # the record is reclaimed by the next update() pass, which visits every bullet anyway.
+
+    def __init__(self, capacity: int = BULLET_POOL_CAPACITY) -> None:
+        self.capacity = capacity
+        self._live: List[Bullet] = []
+        self._free: List[Bullet] = [Bullet(pygame.Rect(0, 0, 0, 0), 0, False, False) for _ in range(capacity)]
+        self.high_water = 0
+        self.dropped = 0
+
+    def spawn(self, x: int, y: int, w: int, h: int, vy: int, from_player: bool) -> Optional[Bullet]:
+        if not self._free:
+            self.dropped += 1
+            return None
+        b = self._free.pop()
+        b.rect.update(x, y, w, h)
+        b.vy = vy
+        b.from_player = from_player
+        b.alive = True
+        b.key = BULLET_KEY.pack(x, vy, w, h, from_player)
+        self._live.append(b)
+        if len(self._live) > self.high_water:
+            self.high_water = len(self._live)
+        return b
+
+    def despawn(self, bullet: Bullet) -> None:
+        bullet.alive = False
+
+    def update(self) -> None:
+        # Move live bullets, then compact in place (stable) and recycle the dead
+        live = self._live
+        free = self._free
+        j = 0
+        for b in live:
+            if b.alive:
+                b.update()
+            if b.alive:
+                live[j] = b
+                j += 1
+            else:
+                free.append(b)
+        del live[j:]
+
+    def columns(self) -> Tuple[bytes, bytes, bytes]:
+        # Live bullets as BULLET_KEY rows, y (i16) and alive (u8) columns: three
+        # attribute reads per bullet instead of unpacking every rect
+        live = self._live
+        return (
+            b"".join([b.key for b in live]),
+            array("h", [b.rect.y for b in live]).tobytes(),
+            bytes([b.alive for b in live]),
+        )
+
+    def restore_columns(self, keys: bytes, ys: Sequence[int], alive: bytes) -> None:
+        # Inverse of columns(). A restored state is usually close to the current one
+        # (rewind, lookahead) and both are in spawn order, so the live records are
+        # matched against the keys in runs (compared as bytes): records in a run keep
+        # their fixed fields and only take y and alive. Keys outside any run are
+        # refilled from free records, and live ones left unmatched are recycled.
+        live = self._live
+        free = self._free
+        size = BULLET_KEY.size
+        current = b"".join([b.key for b in live])
+        n = min(len(ys), len(live) + len(free))
+        self.dropped += len(ys) - n
+        restored: List[Bullet] = []
+        i = j = 0
+        while j < n:
+            if i < len(live) and keys.startswith(live[i].key, j * size):
+                run = _matching_run(current, i, keys, j, min(len(live) - i, n - j))
+            else:
+                run = 0
+            if run:
+                matched = live[i:i + run]
+                for b, y in zip(matched, ys[j:j + run]):
+                    b.rect.y = y
+                    b.alive = True
+                restored.extend(matched)
+                i += run
+                j += run
+                continue
+            # No run here: take a free record, or an unmatched live one once the pool is full
+            b = free.pop() if free else live.pop()
+            pos = j * size
+            x, vy, w, h, from_player = BULLET_KEY.unpack_from(keys, pos)
+            b.rect.update(x, ys[j], w, h)
+            b.vy = vy
+            b.from_player = from_player == 1
+            b.alive = True
+            b.key = keys[pos:pos + size]
+            restored.append(b)
+            j += 1
+        dead = alive.find(0, 0, n)
+        while dead >= 0:
+            restored[dead].alive = False
+            dead = alive.find(0, dead + 1, n)
+        for b in live[i:]:
+            b.alive = False
+        free.extend(live[i:])
+        live[:] = restored
+        if n > self.high_water:
+            self.high_water = n
+
+    def clear(self) -> None:
+        for b in self._live:
+            b.alive = False
+        self._free.extend(self._live)
+        self._live.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "capacity": self.capacity,
+            "live": len(self._live),
+            "free": len(self._free),
+            "high_water": self.high_water,
+            "dropped": self.dropped,
+        }
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def __iter__(self) -> Iterator[Bullet]:
+        return iter(self._live)
+
+    def __getitem__(self, index: int) -> Bullet:
+        return self._live[index]
+
+
 class Player:
     def __init__(self, image: pygame.Surface, shoot_sound) -> None:
         self.image = image
@@ -45,22 +207,67 @@ class Player:
         self.alive = True
 
     def handle_input(self, keys: pygame.key.ScancodeWrapper) -> None:
-        if keys[pygame.K_LEFT] or keys[pygame.K_a]:
-            self.rect.x -= PLAYER_SPEED
-        if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
-            self.rect.x += PLAYER_SPEED
+        left = keys[pygame.K_LEFT] or keys[pygame.K_a]
+        right = keys[pygame.K_RIGHT] or keys[pygame.K_d]
+        self.move(int(bool(right)) - int(bool(left)))
+
+    def move(self, direction: int) -> None:
+        # direction: -1 left, 0 idle, 1 right
+        self.rect.x += PLAYER_SPEED * direction
         self.rect.clamp_ip(pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT))
 
-    def try_shoot(self, bullets: List[Bullet], now_ms: int, bullet_image: pygame.Surface) -> None:
+    def try_shoot(self, bullets: BulletPool, now_ms: int, bullet_image: pygame.Surface) -> None:
         if now_ms - self.last_shot_time < self.cooldown_ms or not self.alive:
             return
+        w, h = bullet_image.get_size()
+        # Bullet midbottom at the ship's midtop
+        if bullets.spawn(self.rect.centerx - w // 2, self.rect.top - h, w, h, BULLET_SPEED, True) is None:
+            return
         self.last_shot_time = now_ms
-        bullet_rect = bullet_image.get_rect(midbottom=self.rect.midtop)
-        bullets.append(Bullet(bullet_rect, BULLET_SPEED, True))
         if self.shoot_sound:
             self.shoot_sound.play()
 
 
+def masks_overlap(mask_a: Optional[pygame.mask.Mask], rect_a: pygame.Rect,
+                  mask_b: Optional[pygame.mask.Mask], rect_b) -> bool:
+    # Narrow phase for rects already known to overlap: do any opaque pixels touch?
+    # Without both masks the rect test stands.
+    if mask_a is None or mask_b is None:
+        return True
+    return mask_a.overlap(mask_b, (rect_b[0] - rect_a[0], rect_b[1] - rect_a[1])) is not None
+
+
+class FormationLayout(NamedTuple):
+    # Slot geometry: slot (row, col) sits at local (x0 + dx * col, y0 + dy * row)
+    x0: int = ENEMY_X_PADDING
+    y0: int = ENEMY_START_Y
+    dx: int = ENEMY_X_PADDING
+    dy: int = ENEMY_Y_PADDING
+
+
+DEFAULT_LAYOUT = FormationLayout()
+
+
+def formation_cells(x: int, y: int, w: int, h: int, ew: int, eh: int, rows: int, cols: int,
+                    layout: FormationLayout = DEFAULT_LAYOUT) -> List[int]:
+    # Formation-space lookup: indices of the rows x cols enemy slots (ew x eh at
+    # slot_position) that a w x h rect at local (x, y) overlaps, colliderect semantics
+    x0, y0, dx, dy = layout
+    x -= x0
+    y -= y0
+    c0 = max(0, (x - ew) // dx + 1)
+    c1 = min(cols - 1, (x + w - 1) // dx)
+    r0 = max(0, (y - eh) // dy + 1)
+    r1 = min(rows - 1, (y + h - 1) // dy)
+    return [r * cols + c for r in range(r0, r1 + 1) for c in range(c0, c1 + 1)]
+
+
+def slot_position(i: int, cols: int, layout: FormationLayout = DEFAULT_LAYOUT) -> Tuple[int, int]:
+    # Local top-left of enemy slot i; world position = local + formation origin
+    row, col = divmod(i, cols)
+    return layout.x0 + col * layout.dx, layout.y0 + row * layout.dy
+
+
 class Enemy:
     def __init__(self, image: pygame.Surface, x: int, y: int) -> None:
         self.image = image
@@ -68,78 +275,236 @@ class Enemy:
         self.alive = True
 
 
+class FormationIndex:
+    # Aggregates over a rows x cols formation's alive flags (enemy i sits at row
+    # i // cols, column i % cols), kept current by kill() instead of rescanned every
+    # tick. Alive enemies move in lockstep, so grid order is screen order: a column's
+    # bottom-most enemy is its last alive row, the extents are the outermost columns
+    # with anyone alive, and the lowest (highest) enemy has the highest (lowest)
+    # alive index.
+
+    def __init__(self, rows: int, cols: int, alive: Optional[Sequence[bool]] = None) -> None:
+        self.rows = rows
+        self.cols = cols
+        self.rebuild([True] * (rows * cols) if alive is None else alive)
+
+    def rebuild(self, alive: Sequence[bool]) -> None:
+        self.alive = [bool(a) for a in alive]
+        self.alive_count = sum(self.alive)
+        # Per column: index of the top-most / bottom-most alive enemy, -1 when empty
+        self.top = [-1] * self.cols
+        self.bottom = [-1] * self.cols
+        self._shooters: Optional[List[int]] = None
+        for c in range(self.cols):
+            self._scan_column(c)
+        self._update_extents()
+
+    def _scan_column(self, c: int) -> None:
+        alive = self.alive
+        live = [i for i in range(c, len(alive), self.cols) if alive[i]]
+        self.top[c] = live[0] if live else -1
+        self.bottom[c] = live[-1] if live else -1
+        self._shooters = None
+
+    def _update_extents(self) -> None:
+        # Leftmost / rightmost alive column, lowest and highest alive enemy (-1 when none)
+        live = [c for c in range(self.cols) if self.top[c] >= 0]
+        self.left = live[0] if live else -1
+        self.right = live[-1] if live else -1
+        self.lowest = max((self.bottom[c] for c in live), default=-1)
+        self.highest = min((self.top[c] for c in live), default=-1)
+
+    def kill(self, i: int) -> None:
+        # O(rows + cols) at worst, and only when i was at the edge of its column
+        if not self.alive[i]:
+            return
+        self.alive[i] = False
+        self.alive_count -= 1
+        c = i % self.cols
+        if i == self.top[c] or i == self.bottom[c]:
+            self._scan_column(c)
+            if self.top[c] < 0 or i == self.lowest or i == self.highest:
+                self._update_extents()
+
+    def shooters(self) -> List[int]:
+        # Bottom-most enemy of each column, columns in the order a row-major scan
+        # first meets them (by top-most alive enemy); the enemy fire draws its random
+        # numbers in this order. Cached until a column changes; do not mutate.
+        if self._shooters is None:
+            live = sorted((c for c in range(self.cols) if self.top[c] >= 0), key=self.top.__getitem__)
+            self._shooters = [self.bottom[c] for c in live]
+        return self._shooters
+
+
 class EnemyFormation:
-    def __init__(self, enemy_image: pygame.Surface, enemy_bullet_image: pygame.Surface, hit_sound, shoot_chance: float = ENEMY_SHOOT_CHANCE) -> None:
+    # Enemies sit at fixed slots relative to one formation origin, so a move or a
+    # drop is a single origin update however large the formation is. Collisions
+    # and the bottom check work in formation space; Enemy rects (world space) are
+    # only brought up to date when `enemies` is read. Rendering goes through
+    # draw_items(), which needs no Enemy objects at all.
+
+    def __init__(self, enemy_image: pygame.Surface, enemy_bullet_image: pygame.Surface, hit_sound, shoot_chance: float = ENEMY_SHOOT_CHANCE,
+                 rng: Optional[random.Random] = None, rows: int = ENEMY_ROWS, cols: int = ENEMY_COLS,
+                 mask: Optional[pygame.mask.Mask] = None, layout: FormationLayout = DEFAULT_LAYOUT,
+                 alive: Optional[Sequence[bool]] = None, hmove: int = ENEMY_HMOVE_PIXELS,
+                 vmove: int = ENEMY_VMOVE_PIXELS) -> None:
+        # layout: slot geometry; alive: initial flag per slot (spawn pattern), all by default
         self.enemy_image = enemy_image
+        # Enemy collision mask; None keeps hits rect-only
+        self.mask = mask
         self.enemy_bullet_image = enemy_bullet_image
         self.hit_sound = hit_sound
         self.shoot_chance = shoot_chance
-        self.enemies: List[Enemy] = []
+        # Seeded generator for deterministic runs; falls back to the module-level one
+        self.rng = rng if rng is not None else random
+        self.rows = rows
+        self.cols = cols
+        self.layout = layout
+        self.hmove = hmove
+        self.vmove = vmove
+        self._enemies: List[Enemy] = []
+        # Offset of the whole formation from its spawn layout
+        self.origin_x = 0
+        self.origin_y = 0
+        self._synced_origin = (0, 0)
         self.direction = 1  # 1 right, -1 left
         self.last_move_time = 0
         self.move_interval_ms = ENEMY_MOVE_INTERVAL_MS
-        self._spawn_grid()
+        self._spawn_grid(rows, cols, alive)
+
+    def _spawn_grid(self, rows: int, cols: int, alive: Optional[Sequence[bool]] = None) -> None:
+        layout = self.layout
+        self._enemies = [Enemy(self.enemy_image, *slot_position(i, cols, layout)) for i in range(rows * cols)]
+        self.index = FormationIndex(rows, cols, alive)
+        if alive is not None:
+            for e, flag in zip(self._enemies, self.index.alive):
+                e.alive = flag
+
+    @property
+    def enemies(self) -> List[Enemy]:
+        # World rects follow the origin lazily; only readers pay for the sync
+        origin = (self.origin_x, self.origin_y)
+        if origin != self._synced_origin:
+            ox, oy = origin
+            cols, layout = self.cols, self.layout
+            for i, e in enumerate(self._enemies):
+                x, y = slot_position(i, cols, layout)
+                e.rect.topleft = (x + ox, y + oy)
+            self._synced_origin = origin
+        return self._enemies
+
+    def draw_items(self) -> List[Tuple[pygame.Surface, Tuple[int, int]]]:
+        # (image, world position) of every alive enemy, for Surface.blits
+        image = self.enemy_image
+        ox, oy = self.origin_x, self.origin_y
+        x0, y0, dx, dy = self.layout
+        cols = self.cols
+        return [(image, (ox + x0 + i % cols * dx, oy + y0 + i // cols * dy))
+                for i, flag in enumerate(self.index.alive) if flag]
 
-    def _spawn_grid(self) -> None:
-        self.enemies.clear()
-        for row in range(ENEMY_ROWS):
-            for col in range(ENEMY_COLS):
-                x = ENEMY_X_PADDING + col * ENEMY_X_PADDING
-                y = ENEMY_START_Y + row * ENEMY_Y_PADDING
-                self.enemies.append(Enemy(self.enemy_image, x, y))
+    def bounds(self) -> Optional[pygame.Rect]:
+        # World rect around every alive enemy; None once all are dead
+        index = self.index
+        if not index.alive_count:
+            return None
+        cols, layout = self.cols, self.layout
+        ew, eh = self.enemy_image.get_size()
+        left, top = slot_position(index.highest // cols * cols + index.left, cols, layout)
+        right, bottom = slot_position(index.lowest // cols * cols + index.right, cols, layout)
+        return pygame.Rect(self.origin_x + left, self.origin_y + top, right - left + ew, bottom - top + eh)
 
-    def update(self, now_ms: int, bullets: List[Bullet]) -> None:
+    def restore(self, origin_x: int, origin_y: int, alive: Sequence[bool]) -> None:
+        # Snapshot restore: origin plus one alive flag per slot
+        if len(alive) != len(self._enemies):
+            raise ValueError(f"snapshot has {len(alive)} enemies, formation has {len(self._enemies)}")
+        self.origin_x, self.origin_y = origin_x, origin_y
+        for e, flag in zip(self._enemies, alive):
+            e.alive = bool(flag)
+        self.index.rebuild(alive)
+
+    @property
+    def alive_count(self) -> int:
+        return self.index.alive_count
+
+    def update(self, now_ms: int, bullets: BulletPool) -> None:
+        cols, layout = self.cols, self.layout
         if now_ms - self.last_move_time >= self.move_interval_ms:
             self.last_move_time = now_ms
             # Horizontal move and boundary check
-            min_x = min((e.rect.left for e in self.enemies if e.alive), default=0)
-            max_x = max((e.rect.right for e in self.enemies if e.alive), default=0)
-            if max_x == 0:  # all dead
+            index = self.index
+            if not index.alive_count:
                 return
-            if (self.direction > 0 and max_x + ENEMY_HMOVE_PIXELS >= SCREEN_WIDTH - 10) or (
-                self.direction < 0 and min_x - ENEMY_HMOVE_PIXELS <= 10
+            min_x = self.origin_x + slot_position(index.left, cols, layout)[0]
+            max_x = self.origin_x + slot_position(index.right, cols, layout)[0] + self.enemy_image.get_width()
+            if (self.direction > 0 and max_x + self.hmove >= SCREEN_WIDTH - 10) or (
+                self.direction < 0 and min_x - self.hmove <= 10
             ):
                 # Move down and reverse
-                for e in self.enemies:
-                    if e.alive:
-                        e.rect.y += ENEMY_VMOVE_PIXELS
+                self.origin_y += self.vmove
                 self.direction *= -1
             else:
-                for e in self.enemies:
-                    if e.alive:
-                        e.rect.x += ENEMY_HMOVE_PIXELS * self.direction
+                self.origin_x += self.hmove * self.direction
 
         # Random shooting from bottom-most enemies per column
-        columns = {}
-        for e in self.enemies:
-            if e.alive:
-                col = e.rect.x // ENEMY_X_PADDING
-                if col not in columns or e.rect.y > columns[col].rect.y:
-                    columns[col] = e
-        for e in columns.values():
-            if random.random() < self.shoot_chance:
-                rect = self.enemy_bullet_image.get_rect(midtop=e.rect.midbottom)
-                bullets.append(Bullet(rect, ENEMY_BULLET_SPEED, False))
-
-    def check_collision_with_bullets(self, bullets: List[Bullet]) -> int:
+        w, h = self.enemy_bullet_image.get_size()
+        ew, eh = self.enemy_image.get_size()
+        for i in self.index.shooters():
+            if self.rng.random() < self.shoot_chance:
+                # Bullet midtop at the enemy's midbottom
+                x, y = slot_position(i, cols, layout)
+                bullets.spawn(self.origin_x + x + ew // 2 - w // 2, self.origin_y + y + eh, w, h, ENEMY_BULLET_SPEED, False)
+
+    def check_collision_with_bullets(self, bullets: BulletPool, grid: Optional[SpatialHash] = None,
+                                     bullet_mask: Optional[pygame.mask.Mask] = None) -> int:
+        # grid: broad phase over `bullets` (by list index); built here when not supplied.
+        # Bullets inside the formation's box are shifted into formation space and
+        # mapped straight to the slots they overlap, so the cost follows the bullets,
+        # not the formation size. Overlaps are confirmed against the masks (when
+        # given). Pairs resolve in enemy order, each enemy taking the first bullet
+        # (list order) still alive, exactly like a scan over the enemies.
+        box = self.bounds()
+        if box is None:
+            return 0
+        if grid is None:
+            grid = SpatialHash()
+            for i, b in enumerate(bullets):
+                if b.alive and b.from_player:
+                    grid.insert(i, b.rect)
+        ox, oy = self.origin_x, self.origin_y
+        ew, eh = self.enemy_image.get_size()
+        rows, cols, layout = self.rows, self.cols, self.layout
+        index = self.index
+        alive = index.alive
+        mask = self.mask
+        pairs = []
+        for j in grid.query(box):
+            b = bullets[j]
+            if not (b.alive and b.from_player):
+                continue
+            bx, by, bw, bh = b.rect
+            bx -= ox
+            by -= oy
+            for i in formation_cells(bx, by, bw, bh, ew, eh, rows, cols, layout):
+                if alive[i] and masks_overlap(mask, slot_position(i, cols, layout), bullet_mask, (bx, by)):
+                    pairs.append((i, j))
         score = 0
-        for e in self.enemies:
-            if not e.alive:
+        used = set()
+        enemies = self._enemies
+        for i, j in sorted(pairs):
+            if not alive[i] or j in used:
                 continue
-            for b in bullets:
-                if b.alive and b.from_player and e.rect.colliderect(b.rect):
-                    e.alive = False
-                    b.alive = False
-                    score += 100
-                    if self.hit_sound:
-                        self.hit_sound.play()
-                    break
+            used.add(j)
+            enemies[i].alive = False
+            index.kill(i)
+            bullets[j].alive = False
+            score += 100
+            if self.hit_sound:
+                self.hit_sound.play()
         return score
 
     def any_reached_bottom(self) -> bool:
-        return any(e.alive and e.rect.bottom >= SCREEN_HEIGHT - 60 for e in self.enemies)
+        lowest = self.index.lowest
+        return lowest >= 0 and self.origin_y + slot_position(lowest, self.cols, self.layout)[1] + self.enemy_image.get_height() >= SCREEN_HEIGHT - 60
 
     def all_dead(self) -> bool:
-        return all(not e.alive for e in self.enemies)
-
-
+        return self.index.alive_count == 0
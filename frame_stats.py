@@ -0,0 +1,171 @@
+import csv
+import json
+import time
+from array import array
+from typing import Dict, List, Optional, Sequence
+import pygame
+from settings import FRAME_STATS_CAPACITY
+
+# Per-phase frame timings kept in a preallocated ring buffer. Game.run() checks
+# `enabled` for the event/input phases; every other phase is timed by shadowing
+# a method on its instance (attach/detach), so a disabled recorder adds nothing
+# to Simulation.step or Game.draw.
+
+# "simulation" is only recorded in pipelined mode, where the simulation thread's
+# work is timed as a whole instead of enemies..effects
+PHASES = ("events", "input", "enemies", "bullets", "collisions", "effects", "simulation", "draw", "present")
+COUNTS = ("enemies", "bullets", "particles", "steps")
+PHASE_INDEX = {name: i for i, name in enumerate(PHASES)}
+# Methods timed per phase while attached
+SIM_PHASES = {"_update_enemies": "enemies", "_update_bullets": "bullets", "_check_collisions": "collisions"}
+GAME_PHASES = {"_update_effects": "effects", "draw": "draw"}
+RENDERER_PHASES = {"present": "present"}
+# Overlay text is rebuilt this often (frames) rather than every frame
+OVERLAY_REFRESH_FRAMES = 15
+
+
+def percentile(values: Sequence[float], p: float) -> float:
+    # Linear interpolation between closest ranks
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * p / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+class FrameStats:
+    def __init__(self, capacity: int = FRAME_STATS_CAPACITY, enabled: bool = False) -> None:
+        self.capacity = capacity
+        self.enabled = enabled
+        self.show_overlay = False
+        # Row-major: one row of phase times (ms) / counts per frame
+        self.times = array("d", bytes(8 * capacity * len(PHASES)))
+        self.totals = array("d", bytes(8 * capacity))
+        self.counts = array("l", [0]) * (capacity * len(COUNTS))
+        self.frames = 0  # frames recorded since the last clear
+        self._current = [0.0] * len(PHASES)
+        self._frame_start = 0.0
+        self._attached = []
+        self._overlay: Optional[pygame.Surface] = None
+        self._overlay_age = 0
+
+    def begin_frame(self) -> None:
+        cur = self._current
+        for i in range(len(cur)):
+            cur[i] = 0.0
+        self._frame_start = time.perf_counter()
+
+    def add(self, phase: str, seconds: float) -> None:
+        self._current[PHASE_INDEX[phase]] += seconds * 1000.0
+
+    def end_frame(self, enemies: int, bullets: int, particles: int, steps: int) -> None:
+        # present() runs inside draw(); report draw without it
+        self._current[PHASE_INDEX["draw"]] -= self._current[PHASE_INDEX["present"]]
+        slot = self.frames % self.capacity
+        base = slot * len(PHASES)
+        self.times[base:base + len(PHASES)] = array("d", self._current)
+        self.totals[slot] = (time.perf_counter() - self._frame_start) * 1000.0
+        base = slot * len(COUNTS)
+        self.counts[base:base + len(COUNTS)] = array("l", (enemies, bullets, particles, steps))
+        self.frames += 1
+
+    def attach(self, target, methods: Dict[str, str]) -> None:
+        # Shadow target's methods with timed wrappers on the instance
+        for method, phase in methods.items():
+            setattr(target, method, self._timed(getattr(target, method), phase))
+            self._attached.append((target, method))
+
+    def detach(self) -> None:
+        for target, method in self._attached:
+            target.__dict__.pop(method, None)
+        self._attached = []
+
+    def _timed(self, fn, phase: str):
+        index = PHASE_INDEX[phase]
+        current = self._current
+        clock = time.perf_counter
+
+        def timed(*args):
+            start = clock()
+            result = fn(*args)
+            current[index] += (clock() - start) * 1000.0
+            return result
+
+        return timed
+
+    def clear(self) -> None:
+        self.frames = 0
+
+    def rows(self) -> List[Dict]:
+        # Recorded frames, oldest first
+        n = min(self.frames, self.capacity)
+        first = self.frames - n
+        out = []
+        for f in range(first, self.frames):
+            slot = f % self.capacity
+            row = {"frame": f, "total_ms": self.totals[slot]}
+            base = slot * len(PHASES)
+            for i, name in enumerate(PHASES):
+                row[f"{name}_ms"] = self.times[base + i]
+            base = slot * len(COUNTS)
+            for i, name in enumerate(COUNTS):
+                row[name] = self.counts[base + i]
+            out.append(row)
+        return out
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        rows = self.rows()
+        out = {}
+        for key in [f"{p}_ms" for p in PHASES] + ["total_ms"]:
+            vals = [r[key] for r in rows]
+            out[key[:-3]] = {"p50": percentile(vals, 50), "p99": percentile(vals, 99), "max": max(vals, default=0.0)}
+        return out
+
+    def dump(self, prefix: str) -> List[str]:
+        rows = self.rows()
+        csv_path, json_path = f"{prefix}.csv", f"{prefix}.json"
+        with open(csv_path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=["frame", "total_ms"] + [f"{p}_ms" for p in PHASES] + list(COUNTS))
+            writer.writeheader()
+            writer.writerows(rows)
+        with open(json_path, "w") as f:
+            json.dump({"summary": self.summary(), "frames": rows}, f, indent=2)
+        return [csv_path, json_path]
+
+    def overlay(self, font: pygame.font.Font) -> pygame.Surface:
+        # Percentiles are recomputed every OVERLAY_REFRESH_FRAMES, not per frame
+        self._overlay_age -= 1
+        if self._overlay is None or self._overlay_age <= 0:
+            self._overlay = self._render_overlay(font)
+            self._overlay_age = OVERLAY_REFRESH_FRAMES
+        return self._overlay
+
+    def _render_overlay(self, font: pygame.font.Font) -> pygame.Surface:
+        # Cells are rendered separately and right-aligned, so any font lines up
+        summary = self.summary()
+        rows = [("faz", "p50", "p99")]
+        for name in PHASES + ("total",):
+            s = summary[name]
+            rows.append((name, f"{s['p50']:.2f}", f"{s['p99']:.2f}"))
+        cells = [[font.render(text, True, (240, 240, 240)) for text in row] for row in rows]
+        widths = [max(row[i].get_width() for row in cells) for i in range(3)]
+        footer = None
+        if self.frames:
+            slot = (self.frames - 1) % self.capacity * len(COUNTS)
+            enemies, bullets, particles, steps = self.counts[slot:slot + len(COUNTS)]
+            footer = font.render(f"dusman {enemies}  mermi {bullets}  parcacik {particles}", True, (240, 240, 240))
+        h = font.get_linesize()
+        w = max(widths[0] + widths[1] + widths[2] + 24, footer.get_width() if footer else 0)
+        surf = pygame.Surface((w + 12, h * (len(cells) + (footer is not None)) + 8))
+        surf.fill((0, 0, 0))
+        surf.set_alpha(200)
+        for i, (name, p50, p99) in enumerate(cells):
+            y = 4 + i * h
+            surf.blit(name, (6, y))
+            surf.blit(p50, (6 + widths[0] + 12 + widths[1] - p50.get_width(), y))
+            surf.blit(p99, (6 + w - p99.get_width(), y))
+        if footer:
+            surf.blit(footer, (6, 4 + len(cells) * h))
+        return surf
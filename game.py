@@ -1,130 +1,388 @@
+import random
+import threading
+import time
 import pygame
-from typing import List
+from typing import List, Optional, Tuple
 from settings import (
     SCREEN_WIDTH,
     SCREEN_HEIGHT,
     FPS,
+    SIM_HZ,
+    MAX_CATCHUP_STEPS,
+    RENDER_INTERPOLATION,
+    DIRTY_RECTS,
     COLOR_BG,
     COLOR_WHITE,
     WINDOW_TITLE,
     DEFAULT_SFX_VOLUME,
-    DIFFICULTY_PRESETS,
+    SIM_BACKEND,
+    FRAME_STATS_ENABLED,
+    RECORD_REPLAYS,
+    REWIND_ENABLED,
+    REWIND_STEPS_PER_FRAME,
+    PIPELINED_SIM,
+    GOVERNOR_ENABLED,
 )
-from assets_loader import Assets
-from entities import Player, Bullet, EnemyFormation
-from effects import Explosion
-from ui import Button, Slider, draw_panel
+from assets_loader import Assets, BackgroundTask
+from effects import ParticleSystem, BURST_ENEMY, BURST_PLAYER
+from governor import FrameGovernor
+from simulation import (
+    Simulation,
+    InputState,
+    EVENT_SHOOT,
+    EVENT_HIT,
+    EVENT_PLAYER_HIT,
+    EVENT_GAME_OVER,
+)
+from soa import ArraySimulation, HAS_NUMPY
+from ui import Button, Slider, draw_panel, text_cache
+from render import DirtyRectRenderer
+from replay import InputRecorder, Replay
+from snapshot import RewindBuffer, save_state, load_state
+from pipeline import Frame, SimulationThread
+from frame_stats import FrameStats, SIM_PHASES, GAME_PHASES, RENDERER_PHASES, OVERLAY_REFRESH_FRAMES
+
+
+# Transparent color of pre-composed screen panels
+PANEL_COLORKEY = (255, 0, 255)
+# HUD names of the frame-budget governor's levels (governor.FrameGovernor.LEVELS)
+GOVERNOR_LABELS = ("Tam", "Az patlama", "Sadece parlama", "Kare atlama", "Dusuk cozunurluk")
 
 
 class Game:
-    def __init__(self) -> None:
-        pygame.init()
+    def __init__(self, start_time: Optional[float] = None) -> None:
+        # start_time: perf_counter() at process start, for the time-to-first-frame report
+        self.start_time = time.perf_counter() if start_time is None else start_time
+        self.first_frame_ms: Optional[float] = None
+        # Only what the menu needs is initialised here; the mixer (which pygame.init()
+        # would open synchronously), sounds and the small font load in the background
+        pygame.display.init()
+        pygame.font.init()
         pygame.display.set_caption(WINDOW_TITLE)
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         self.clock = pygame.time.Clock()
+        self.renderer = DirtyRectRenderer(self.screen, COLOR_BG, enabled=DIRTY_RECTS)
+        self._screen_key = None
 
         self.font_large = pygame.font.SysFont("Arial", 40)
-        self.font_small = pygame.font.SysFont("Arial", 24)
         self.font_medium = pygame.font.SysFont("Arial", 30)
+        # Settings screen and HUD font; set by _finish_loading()
+        self.font_small: Optional[pygame.font.Font] = None
 
+        # Sprites are drawn behind the menu, so images load up front. Until the
+        # background task lands, assets.sounds is empty and every lookup is silent.
         self.assets = Assets()
-        self.assets.load()
-        # Apply default volume
-        vol = DEFAULT_SFX_VOLUME
-        for s in self.assets.sounds.values():
-            if s:
-                s.set_volume(vol)
+        self.assets.load_images()
+        self.particles = ParticleSystem([self.assets.images["explosion_1"], self.assets.images["explosion_2"]])
+        self._loader: Optional[BackgroundTask] = BackgroundTask(self._load_deferred).start()
 
         # Game state
         self.state = "menu"  # menu | settings | playing | game_over
-        self.level = 1
         self.sfx_volume = DEFAULT_SFX_VOLUME
-        self.difficulty = "Normal"
+        # Frame budget while playing; the last draw's cost stands in for frames
+        # the governor skips
+        self.governor = FrameGovernor()
+        self._draw_ms = 0.0
+        self._frame = 0
+        # Pipelined mode: the simulation thread, and the lock both threads take
+        # before touching the simulation (see pipeline.py)
+        self.sim_thread: Optional[SimulationThread] = None
+        self.lock = threading.Lock()
+        if SIM_BACKEND == "numpy" and HAS_NUMPY:
+            self.sim = ArraySimulation(self.assets.images, "Normal", masks=self.assets.masks)
+        else:
+            self.sim = Simulation(self.assets.images, "Normal", masks=self.assets.masks)
         self.reset()
         self._build_ui()
         self.menu_focus_idx = 0
         self.settings_focus_idx = 0  # 0..2 difficulty buttons, 3 back, 4 slider
 
-    def reset(self) -> None:
-        self.player = Player(self.assets.images["player"], self.assets.sounds.get("shoot"))
-        self.player_bullet_image = self.assets.images["bullet"]
-        self.enemy_bullet_image = self.assets.images["enemy_bullet"]
-        self.enemies = EnemyFormation(self.assets.images["enemy"], self.enemy_bullet_image, self.assets.sounds.get("hit"))
-        self._apply_difficulty_to_enemies()
-        self.bullets: List[Bullet] = []
-        self.explosions: List[Explosion] = []
-        self.score = 0
-        self.game_over = False
-
-    def run(self) -> None:
+        # Frame timing; F3 toggles the overlay (and recording), F4 dumps the buffer
+        self.stats = FrameStats()
+        self.font_stats: Optional[pygame.font.Font] = None
+        if FRAME_STATS_ENABLED:
+            self._set_stats_recording(True)
+
+    @property
+    def difficulty(self) -> str:
+        return self.sim.difficulty
+
+    def reset(self, seed: Optional[int] = None) -> None:
+        # Restarts from level 1, like every "new game" path did before. Every game
+        # gets its own seed so its recorded inputs replay exactly.
+        if seed is None:
+            seed = random.getrandbits(32)
+        self.sim.reset(seed=seed)
+        if self.sim_thread is not None:
+            # A frame captured before the reset must not be drawn after it
+            self.sim_thread.frame = None
+        self.recorder: Optional[InputRecorder] = InputRecorder(seed, self.difficulty, self.sim.horde) if RECORD_REPLAYS else None
+        self._saved_ticks = 0
+        self.replay: Optional[Replay] = None
+        self._replay_inputs = None
+        self.replay_result: Optional[List[str]] = None
+        self.time_scale = 1
+        self.particles.clear()
+        self.governor.reset()
+        self._apply_governor()
+        # Fixed-timestep bookkeeping: unsimulated time and the player's previous x
+        self.accumulator_ms = 0.0
+        self.prev_player_x = self.sim.player.rect.x
+        # Snapshots cover a single formation, so horde games cannot rewind
+        self.rewind: Optional[RewindBuffer] = RewindBuffer() if REWIND_ENABLED and not self.sim.horde else None
+        if self.rewind is not None:
+            self.rewind.push(save_state(self.sim, self.particles))
+
+    def _load_deferred(self):
+        # Worker thread: must not touch Game or Assets state the main thread reads
+        Assets.init_mixer()
+        sounds = self.assets.read_sounds()
+        font_small = pygame.font.SysFont("Arial", 24)
+        return sounds, font_small
+
+    def _finish_loading(self, wait: bool = False) -> None:
+        # Main thread: adopt the background results once ready (or block for them
+        # when a screen that needs them is about to be drawn)
+        loader = self._loader
+        if loader is None or not (wait or loader.done()):
+            return
+        sounds, self.font_small = loader.wait()
+        self._loader = None
+        for s in sounds.values():
+            if s:
+                s.set_volume(self.sfx_volume)
+        self.assets.sounds.update(sounds)
+        self._build_settings_buttons()
+        if self.stats.enabled:
+            elapsed = (time.perf_counter() - self.start_time) * 1000.0
+            print(f"Assets ready after {elapsed:.0f} ms (background load {loader.elapsed_ms:.0f} ms)")
+
+    def _set_stats_recording(self, enabled: bool) -> None:
+        stats = self.stats
+        stats.detach()
+        stats.enabled = enabled
+        if enabled:
+            stats.attach(self.renderer, RENDERER_PHASES)
+            if self.sim_thread is None:
+                stats.attach(self.sim, SIM_PHASES)
+                stats.attach(self, GAME_PHASES)
+            else:
+                # Pipelined: those phases run on the simulation thread while this
+                # one records; the thread's work is timed as a whole ("simulation")
+                stats.attach(self, {"draw": "draw"})
+
+    def _handle_stats_key(self, key: int) -> None:
+        stats = self.stats
+        if key == pygame.K_F3:
+            stats.show_overlay = not stats.show_overlay
+            if stats.show_overlay and not stats.enabled:
+                stats.clear()
+                self._set_stats_recording(True)
+            elif not stats.show_overlay and not FRAME_STATS_ENABLED:
+                self._set_stats_recording(False)
+            if self.font_stats is None:
+                self.font_stats = pygame.font.SysFont("Courier New", 14)
+            self.renderer.invalidate()
+        elif key == pygame.K_F4 and stats.frames:
+            paths = stats.dump(time.strftime("frame_stats_%Y%m%d_%H%M%S"))
+            print("Frame stats written to " + ", ".join(paths))
+
+    def run(self, pipelined: Optional[bool] = None) -> None:
+        # pipelined: step the simulation on its own thread (see pipeline.py);
+        # defaults to settings.PIPELINED_SIM
+        if PIPELINED_SIM if pipelined is None else pipelined:
+            self.sim_thread = SimulationThread(self)
+            if self.stats.enabled:
+                # Re-attach for the thread before it starts stepping
+                self._set_stats_recording(True)
+            self.sim_thread.start()
+        try:
+            self._loop()
+        finally:
+            if self.sim_thread is not None:
+                self.sim_thread.stop()
+                self.sim_thread = None
+                if self.stats.enabled:
+                    self._set_stats_recording(True)
+
+    def _loop(self) -> None:
+        stats = self.stats
+        clock = time.perf_counter
+        step_ms = 1000.0 / SIM_HZ
+        # Pipelined: the simulation thread's step and work totals at the last frame
+        thread_steps = 0
+        thread_work_ms = 0.0
         while True:
             dt = self.clock.tick(FPS)
-            now_ms = pygame.time.get_ticks()
-
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    return
-                if event.type == pygame.KEYDOWN:
-                    if self.state == "menu":
-                        if event.key in (pygame.K_UP, pygame.K_w):
-                            self.menu_focus_idx = (self.menu_focus_idx - 1) % len(self.menu_buttons)
-                        elif event.key in (pygame.K_DOWN, pygame.K_s):
-                            self.menu_focus_idx = (self.menu_focus_idx + 1) % len(self.menu_buttons)
-                        elif event.key in (pygame.K_RETURN, pygame.K_SPACE):
-                            # activate focused
-                            self._activate_menu_button(self.menu_focus_idx)
-                        elif event.key == pygame.K_ESCAPE:
+            frame_start = clock()
+            self._frame += 1
+            self._finish_loading()
+            thread = self.sim_thread
+            if thread is not None:
+                if thread.error is not None:
+                    raise thread.error
+                if thread.frame is None:
+                    # Nothing published yet (startup, just after a reset): keep
+                    # the window responsive, record and draw nothing
+                    with self.lock:
+                        if not self._handle_events():
                             return
-                    elif self.state == "settings":
-                        if event.key in (pygame.K_LEFT, pygame.K_a):
-                            if self.settings_focus_idx == 4:
-                                self._set_volume(max(0.0, round(self.sfx_volume - 0.05, 2)))
-                            else:
-                                self.settings_focus_idx = (self.settings_focus_idx - 1) % 5
-                        elif event.key in (pygame.K_RIGHT, pygame.K_d):
-                            if self.settings_focus_idx == 4:
-                                self._set_volume(min(1.0, round(self.sfx_volume + 0.05, 2)))
-                            else:
-                                self.settings_focus_idx = (self.settings_focus_idx + 1) % 5
-                        elif event.key in (pygame.K_UP, pygame.K_w):
-                            # move to top row (difficulty buttons)
-                            if self.settings_focus_idx >= 3:
-                                self.settings_focus_idx = 1
-                        elif event.key in (pygame.K_DOWN, pygame.K_s):
-                            # move to bottom controls (back and slider)
-                            if self.settings_focus_idx < 3:
-                                self.settings_focus_idx = 3
-                        elif event.key in (pygame.K_RETURN, pygame.K_SPACE):
-                            self._activate_settings_control(self.settings_focus_idx)
-                        elif event.key == pygame.K_ESCAPE:
-                            self.state = "menu"
-                    elif self.state == "game_over":
-                        if event.key == pygame.K_RETURN:
-                            self.level = 1
-                            self.reset()
-                            self.state = "playing"
-                        elif event.key == pygame.K_ESCAPE:
-                            self.state = "menu"
-
-            # Keyboard-only mode: do not drain event queue again for mouse
+                    thread.keys = pygame.key.get_pressed()
+                    continue
+            recording = stats.enabled
+            if recording:
+                stats.begin_frame()
+                t0 = clock()
+
+            with self.lock:
+                if not self._handle_events():
+                    return
 
+            if recording:
+                t1 = clock()
+                stats.add("events", t1 - t0)
             keys = pygame.key.get_pressed()
-            if self.state == "playing" and not self.game_over:
+            if recording:
+                stats.add("input", clock() - t1)
+            if thread is None:
+                steps, alpha = self.advance(dt, keys)
+                frame = None
+            else:
+                # Draw the latest published frame, interpolated by the time since.
+                # None when this frame's events reset the game: nothing to draw yet.
+                thread.keys = keys
+                frame = thread.frame
+                total_steps, total_work_ms = thread.steps_total, thread.work_total_ms
+                steps = total_steps - thread_steps
+                if recording:
+                    stats.add("simulation", (total_work_ms - thread_work_ms) / 1000.0)
+                thread_steps, thread_work_ms = total_steps, total_work_ms
+                alpha = 1.0
+                if frame is not None and frame.interpolate:
+                    elapsed_ms = (clock() - frame.captured_at) * 1000.0 * self.time_scale
+                    alpha = min(1.0, (frame.accumulator_ms + elapsed_ms) / step_ms)
+            governed = GOVERNOR_ENABLED and self.state == "playing"
+            update_ms = (clock() - frame_start) * 1000.0
+            drawable = thread is None or frame is not None
+            if drawable and (not governed or self._frame % self.governor.render_every == 0):
+                t_draw = clock()
+                self.draw(alpha, frame)
+                self._draw_ms = (clock() - t_draw) * 1000.0
+            if governed:
+                # Pipelined, stepping overlaps drawing: the slower of the two sets the pace
+                self._observe_frame(max(self._draw_ms, thread.work_ms) if thread is not None else update_ms + self._draw_ms)
+            if recording:
+                if thread is None:
+                    sim = self.sim
+                    stats.end_frame(sim.enemies.alive_count, len(sim.bullets), len(self.particles), steps)
+                elif frame is not None:
+                    # The simulation is the other thread's; count what was drawn
+                    stats.end_frame(len(frame.enemies), len(frame.bullets), len(frame.particles), steps)
+                else:
+                    stats.end_frame(0, 0, 0, steps)
+
+    def _handle_events(self) -> bool:
+        # False once the game should quit
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self._save_recording()
+                return False
+            if event.type == pygame.KEYDOWN:
+                if event.key in (pygame.K_F3, pygame.K_F4):
+                    self._handle_stats_key(event.key)
+                elif self.state == "menu":
+                    if event.key in (pygame.K_UP, pygame.K_w):
+                        self.menu_focus_idx = (self.menu_focus_idx - 1) % len(self.menu_buttons)
+                    elif event.key in (pygame.K_DOWN, pygame.K_s):
+                        self.menu_focus_idx = (self.menu_focus_idx + 1) % len(self.menu_buttons)
+                    elif event.key in (pygame.K_RETURN, pygame.K_SPACE):
+                        # activate focused
+                        self._activate_menu_button(self.menu_focus_idx)
+                    elif event.key == pygame.K_ESCAPE:
+                        return False
+                elif self.state == "settings":
+                    if event.key in (pygame.K_LEFT, pygame.K_a):
+                        if self.settings_focus_idx == 4:
+                            self._set_volume(max(0.0, round(self.sfx_volume - 0.05, 2)))
+                        else:
+                            self.settings_focus_idx = (self.settings_focus_idx - 1) % 5
+                    elif event.key in (pygame.K_RIGHT, pygame.K_d):
+                        if self.settings_focus_idx == 4:
+                            self._set_volume(min(1.0, round(self.sfx_volume + 0.05, 2)))
+                        else:
+                            self.settings_focus_idx = (self.settings_focus_idx + 1) % 5
+                    elif event.key in (pygame.K_UP, pygame.K_w):
+                        # move to top row (difficulty buttons)
+                        if self.settings_focus_idx >= 3:
+                            self.settings_focus_idx = 1
+                    elif event.key in (pygame.K_DOWN, pygame.K_s):
+                        # move to bottom controls (back and slider)
+                        if self.settings_focus_idx < 3:
+                            self.settings_focus_idx = 3
+                    elif event.key in (pygame.K_RETURN, pygame.K_SPACE):
+                        self._activate_settings_control(self.settings_focus_idx)
+                    elif event.key == pygame.K_ESCAPE:
+                        self.state = "menu"
+                elif self.state == "game_over":
+                    if event.key == pygame.K_RETURN:
+                        self.reset()
+                        self.state = "playing"
+                    elif event.key == pygame.K_ESCAPE:
+                        self.state = "menu"
+        # Keyboard-only mode: do not drain event queue again for mouse
+        return True
+
+    def advance(self, dt: float, keys) -> Tuple[int, float]:
+        # Run the simulation steps `dt` ms of real time call for (or rewind while
+        # Backspace is held); returns (steps run, interpolation alpha)
+        step_ms = 1000.0 / SIM_HZ
+        now_ms = pygame.time.get_ticks()
+        alpha = 1.0
+        steps = 0
+        if self.rewind is not None and keys[pygame.K_BACKSPACE] and self.state in ("playing", "game_over"):
+            self._rewind(REWIND_STEPS_PER_FRAME)
+        elif self.state == "playing" and not self.sim.game_over:
+            # Run as many fixed steps as real time demands, capped so a long
+            # stall does not turn into a burst of catch-up frames
+            # (replays at 4x/16x scale both the clock and the catch-up cap)
+            self.accumulator_ms += dt * self.time_scale
+            max_steps = MAX_CATCHUP_STEPS * self.time_scale
+            # Stop at a game over (or a finished replay) partway through: further
+            # steps would record inputs and snapshots past the end of the game
+            while self.accumulator_ms >= step_ms and steps < max_steps and self.state == "playing" and not self.sim.game_over:
                 self.update(now_ms, keys)
-            self.draw()
-
-    def _apply_difficulty_to_enemies(self) -> None:
-        preset = DIFFICULTY_PRESETS.get(self.difficulty, DIFFICULTY_PRESETS["Normal"])
-        self.enemies.move_interval_ms = preset["enemy_move_interval_ms"]
-        self.enemies.shoot_chance = preset["enemy_shoot_chance"]
-        # scale by level (increase challenge as level rises)
-        if self.level > 1:
-            self.enemies.move_interval_ms = max(100, int(self.enemies.move_interval_ms * (0.94 ** (self.level - 1))))
-            self.enemies.shoot_chance *= (1.06 ** (self.level - 1))
+                self.accumulator_ms -= step_ms
+                steps += 1
+            if steps == max_steps:
+                self.accumulator_ms = min(self.accumulator_ms, step_ms)
+            if RENDER_INTERPOLATION:
+                alpha = min(1.0, self.accumulator_ms / step_ms)
+        else:
+            self.accumulator_ms = 0.0
+        return steps, alpha
+
+    def _observe_frame(self, frame_ms: float) -> None:
+        # Shed (or restore) presentation detail to hold the frame budget
+        gov = self.governor
+        if gov.observe(frame_ms):
+            self._apply_governor()
+            if self.stats.enabled:
+                print(f"Detail level {gov.level}: {gov.name} (avg frame {gov.avg_ms:.1f} ms)")
+
+    def _apply_governor(self) -> None:
+        # Particle settings; frame skipping and render scale are read when drawing
+        gov = self.governor
+        self.particles.detail = gov.particle_detail
+        self.particles.max_bursts = gov.burst_cap
+
+    def start_game(self, horde: bool = False) -> None:
+        self.sim.horde = horde
+        self.reset()
+        self.state = "playing"
 
     def _set_difficulty(self, name: str) -> None:
-        self.difficulty = name
-        self._apply_difficulty_to_enemies()
+        self.sim.difficulty = name
+        self.sim.apply_difficulty()
         # provide subtle feedback via volume-adjusted click if available
         if self.assets.sounds.get("hit"):
             snd = self.assets.sounds["hit"]
@@ -135,6 +393,7 @@ class Game:
 
     def _set_volume(self, value: float) -> None:
         self.sfx_volume = value
+        self.volume_slider.set_value(value)
         for s in self.assets.sounds.values():
             if s:
                 s.set_volume(self.sfx_volume)
@@ -144,24 +403,35 @@ class Game:
         btn_w, btn_h = 260, 54
         spacing = 16
         # Menu buttons
-        def start_game():
-            self.level = 1
-            self.reset()
-            self.state = "playing"
-
         def go_settings():
             self.state = "settings"
 
         def exit_game():
             pygame.event.post(pygame.event.Event(pygame.QUIT))
 
+        y0 = cy - 110
         self.menu_buttons = [
-            Button(pygame.Rect(cx - btn_w // 2, cy - btn_h - spacing, btn_w, btn_h), "Basla", self.font_medium, start_game),
-            Button(pygame.Rect(cx - btn_w // 2, cy, btn_w, btn_h), "Ayarlar", self.font_medium, go_settings),
-            Button(pygame.Rect(cx - btn_w // 2, cy + btn_h + spacing, btn_w, btn_h), "Cikis", self.font_medium, exit_game),
+            Button(pygame.Rect(cx - btn_w // 2, y0 + i * (btn_h + spacing), btn_w, btn_h), label, self.font_medium, action)
+            for i, (label, action) in enumerate((
+                ("Basla", self.start_game),
+                ("Sonsuz Akin", lambda: self.start_game(horde=True)),
+                ("Ayarlar", go_settings),
+                ("Cikis", exit_game),
+            ))
         ]
 
-        # Settings buttons
+        # Volume slider
+        self.volume_slider = Slider(pygame.Rect(cx - 200, cy + 30, 400, 30), self.sfx_volume, self._set_volume)
+
+        # Screen panels; their contents are pre-composed by _compose_menu/_compose_settings
+        self.menu_panel = pygame.Rect(cx - 260, cy - 190, 520, 380)
+        self.settings_panel = pygame.Rect(cx - 300, cy - 180, 600, 360)
+        self._overlays = {}
+        self.settings_buttons: List[Button] = []
+
+    def _build_settings_buttons(self) -> None:
+        # Needs font_small, which arrives with the background load
+        cx, cy = SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2
         diff_w = 180
         y0 = cy - 40
         self.settings_buttons = [
@@ -171,17 +441,58 @@ class Game:
             Button(pygame.Rect(cx - 90, cy + 90, 180, 48), "Menu", self.font_small, lambda: setattr(self, "state", "menu")),
         ]
 
-        # Volume slider
-        self.volume_slider = Slider(pygame.Rect(cx - 200, cy + 30, 400, 30), self.sfx_volume, self._set_volume)
+    def _overlay(self, name: str, key, widgets, compose) -> pygame.Surface:
+        # Screens are composed once and reused until what they show changes:
+        # their key (focus, difficulty, volume) or a widget invalidated itself
+        cached = self._overlays.get(name)
+        if cached is None or cached[0] != key or any(w.dirty for w in widgets):
+            cached = (key, compose())
+            self._overlays[name] = cached
+        return cached[1]
+
+    def _panel_surface(self, panel: pygame.Rect) -> pygame.Surface:
+        # Opaque surface whose rounded corners are keyed out: blits much faster
+        # than per-pixel alpha, and nothing on a panel is drawn in the key color
+        surf = pygame.Surface(panel.size).convert()
+        surf.fill(PANEL_COLORKEY)
+        surf.set_colorkey(PANEL_COLORKEY, pygame.RLEACCEL)
+        return surf
+
+    def _compose_menu(self) -> pygame.Surface:
+        panel = self.menu_panel
+        surf = self._panel_surface(panel)
+        draw_panel(surf, surf.get_rect(), (20, 20, 40), border=(80, 80, 120))
+        title = text_cache.render(self.font_large, "Space Invaders", True, COLOR_WHITE)
+        surf.blit(title, title.get_rect(center=(SCREEN_WIDTH // 2 - panel.x, 44)))
+        for i, b in enumerate(self.menu_buttons):
+            b.draw(surf, focused=(i == self.menu_focus_idx), origin=panel.topleft)
+        return surf
+
+    def _compose_settings(self) -> pygame.Surface:
+        panel = self.settings_panel
+        surf = self._panel_surface(panel)
+        cx = SCREEN_WIDTH // 2 - panel.x
+        draw_panel(surf, surf.get_rect(), (20, 20, 40), border=(80, 80, 120))
+        title = text_cache.render(self.font_large, "Ayarlar", True, COLOR_WHITE)
+        surf.blit(title, title.get_rect(center=(cx, 40)))
+        sub = text_cache.render(self.font_small, f"Zorluk: {self.difficulty}", True, COLOR_WHITE)
+        surf.blit(sub, sub.get_rect(center=(cx, 90)))
+        for i, b in enumerate(self.settings_buttons):
+            b.draw(surf, focused=(i == self.settings_focus_idx), origin=panel.topleft)
+        # Volume
+        vol_label = text_cache.render(self.font_small, f"SFX Ses: {int(self.sfx_volume * 100)}%", True, COLOR_WHITE)
+        surf.blit(vol_label, vol_label.get_rect(center=(cx, 160)))
+        self.volume_slider.draw(surf, focused=(self.settings_focus_idx == 4), origin=panel.topleft)
+        return surf
 
     def _activate_menu_button(self, idx: int) -> None:
         if idx == 0:
-            self.level = 1
-            self.reset()
-            self.state = "playing"
+            self.start_game()
         elif idx == 1:
-            self.state = "settings"
+            self.start_game(horde=True)
         elif idx == 2:
+            self.state = "settings"
+        elif idx == 3:
             pygame.event.post(pygame.event.Event(pygame.QUIT))
 
     def _activate_settings_control(self, idx: int) -> None:
@@ -195,109 +506,197 @@ class Game:
             self.state = "menu"
         # idx 4 is slider; activation not needed
 
+    def start_replay(self, replay: Replay, speed: int = 1) -> None:
+        # Play a recording instead of the keyboard, `speed` simulation steps per tick
+        self._finish_loading(wait=True)
+        self.sim.difficulty = replay.difficulty
+        self.sim.horde = replay.horde
+        self.reset(seed=replay.seed)
+        self.recorder = None
+        self.rewind = None
+        self.replay = replay
+        self._replay_inputs = replay.inputs()
+        self.time_scale = speed
+        self.state = "playing"
+
+    def _finish_replay(self) -> None:
+        self.replay_result = self.replay.check(self.sim)
+        self._replay_inputs = None
+        if self.replay_result:
+            print("Replay diverged: " + "; ".join(self.replay_result))
+        else:
+            print(f"Replay reproduced: tick {self.sim.tick}, score {self.sim.score}, level {self.sim.level}")
+        if not self.sim.game_over:
+            # Recording was cut short (player quit); nothing left to play
+            self.state = "menu"
+
+    def _save_recording(self) -> None:
+        # Runs on game over and on quit. A game rewound past its game over keeps
+        # recording the new timeline and is saved again when that one ends.
+        rec = self.recorder
+        if rec is not None and rec.ticks != self._saved_ticks:
+            path = rec.save(self.sim)
+            self._saved_ticks = rec.ticks
+            # Saved quietly in normal play (the newest file in REPLAY_DIR is the
+            # last game); the path is printed while frame stats are recording
+            if path and self.stats.enabled:
+                print(f"Replay saved to {path}")
+
+    def _rewind(self, steps: int) -> None:
+        data = self.rewind.rewind(steps)
+        if data is None:
+            return
+        load_state(self.sim, data, self.particles)
+        self.prev_player_x = self.sim.player.rect.x
+        self.accumulator_ms = 0.0
+        if self.recorder is not None:
+            self.recorder.truncate(self.sim.tick)
+        self.state = "playing"
+
     def update(self, now_ms: int, keys) -> None:
-        # Player
-        self.player.handle_input(keys)
-        if keys[pygame.K_SPACE]:
-            self.player.try_shoot(self.bullets, now_ms, self.player_bullet_image)
-
-        # Enemies
-        self.enemies.update(now_ms, self.bullets)
-
-        # Bullets
-        for b in self.bullets:
-            if b.alive:
-                b.update()
-        self.bullets = [b for b in self.bullets if b.alive]
-
-        # Collisions: player bullets vs enemies
-        gained = self.enemies.check_collision_with_bullets(self.bullets)
-        if gained:
-            self.score += gained
-            # Add a simple explosion where collision happened (approx: center of dead enemies)
-            # For simplicity, we spawn explosions at bullets' positions that hit
-            for b in [x for x in self.bullets if not x.alive and x.from_player]:
-                self.explosions.append(Explosion([self.assets.images["explosion_1"], self.assets.images["explosion_2"]], b.rect.center))
-
-        # Collisions: enemy bullets vs player
-        for b in self.bullets:
-            if b.alive and not b.from_player and self.player.rect.colliderect(b.rect):
-                b.alive = False
-                self.player.alive = False
-                self.game_over = True
-                if self.assets.sounds.get("game_over"):
-                    self.assets.sounds["game_over"].play()
-                self.explosions.append(Explosion([self.assets.images["explosion_1"], self.assets.images["explosion_2"]], self.player.rect.center))
-                break
-
-        if self.enemies.any_reached_bottom():
-            self.player.alive = False
-            self.game_over = True
-            if self.assets.sounds.get("game_over"):
-                self.assets.sounds["game_over"].play()
-
-        if self.enemies.all_dead():
-            # Next level: increase difficulty a bit each level
-            self.level += 1
-            self.enemies = EnemyFormation(self.assets.images["enemy"], self.enemy_bullet_image, self.assets.sounds.get("hit"))
-            # Re-apply difficulty + level scaling
-            self._apply_difficulty_to_enemies()
-
-        # Effects
-        for fx in self.explosions:
-            if fx.alive:
-                fx.update(now_ms)
-        self.explosions = [fx for fx in self.explosions if fx.alive]
-
-    def draw(self) -> None:
-        self.screen.fill(COLOR_BG)
-
-        # Draw entities
-        if self.player.alive:
-            self.screen.blit(self.player.image, self.player.rect)
-        for e in self.enemies.enemies:
-            if e.alive:
-                self.screen.blit(e.image, e.rect)
-        for b in self.bullets:
-            img = self.player_bullet_image if b.from_player else self.enemy_bullet_image
-            self.screen.blit(img, b.rect)
-        for fx in self.explosions:
-            fx.draw(self.screen)
+        if self.sim.game_over:
+            # Nothing after the end may reach the recording or the rewind buffer
+            return
+        self.prev_player_x = self.sim.player.rect.x
+        if self._replay_inputs is not None:
+            inputs = next(self._replay_inputs, None)
+            if inputs is None:
+                self._finish_replay()
+                return
+        else:
+            inputs = InputState.from_keys(keys)
+            if self.recorder is not None:
+                self.recorder.record(inputs)
+        sim = self.sim
+        sim.step(inputs)
+        for kind, pos in sim.events:
+            if kind == EVENT_SHOOT:
+                self._play("shoot")
+            elif kind == EVENT_HIT:
+                self._play("hit")
+                self.particles.burst(BURST_ENEMY, pos, sim.tick, sim.level)
+            elif kind == EVENT_PLAYER_HIT:
+                self.particles.burst(BURST_PLAYER, pos, sim.tick, sim.level)
+            elif kind == EVENT_GAME_OVER:
+                self._play("game_over")
+                self.state = "game_over"
+                if self.replay is not None:
+                    self._finish_replay()
+                else:
+                    self._save_recording()
+
+        self._update_effects()
+        if self.rewind is not None:
+            self.rewind.push(save_state(sim, self.particles))
+
+    def _update_effects(self) -> None:
+        # Particles run on the simulation tick, so a rewind can rebuild them
+        self.particles.update(self.sim.tick)
+
+    def _play(self, name: str) -> None:
+        snd = self.assets.sounds.get(name)
+        if snd:
+            snd.play()
+
+    def capture_frame(self, steps: int = 0, detach: bool = False) -> Frame:
+        # What draw() shows of the world, copied out of the simulation. detach:
+        # the frame outlives this step (pipelined mode), so particles are copied too.
+        sim = self.sim
+        player = sim.player
+        pimg, eimg = sim.player_bullet_image, sim.enemy_bullet_image
+        bullets = list(sim.bullets)
+        return Frame(
+            tick=sim.tick,
+            steps=steps,
+            player=(player.image, player.rect.x, self.prev_player_x, player.rect.y) if player.alive else None,
+            enemies=sim.enemies.draw_items(),
+            enemy_box=sim.enemies.bounds(),
+            bullets=[(pimg if b.from_player else eimg, b.rect.topleft) for b in bullets],
+            bullet_vy=[b.vy for b in bullets] if RENDER_INTERPOLATION else [],
+            particles=self.particles.freeze() if detach else self.particles,
+            score=sim.score,
+            level_text=f"Dalga: {sim.enemies.wave}" if sim.horde else f"Seviye: {sim.level}",
+            game_over=sim.game_over,
+            accumulator_ms=self.accumulator_ms,
+            interpolate=RENDER_INTERPOLATION and self.state == "playing" and not sim.game_over,
+            captured_at=time.perf_counter(),
+        )
+
+    def draw(self, alpha: float = 1.0, frame: Optional[Frame] = None) -> None:
+        # alpha: position between the previous (0) and current (1) simulation state.
+        # frame: what to show of the world; captured from the simulation when not given.
+        if self._loader is not None and self.state != "menu":
+            # Only the menu can be shown before the background load has landed
+            self._finish_loading(wait=True)
+        r = self.renderer
+        # Static screens are only redrawn when something they show has changed
+        key = None
+        if self.state != "playing":
+            # The tick: a pipelined frame drawn on game over may predate it
+            tick = frame.tick if frame is not None else self.sim.tick
+            key = (self.state, self.menu_focus_idx, self.settings_focus_idx, self.difficulty, self.sfx_volume, tick)
+            if self.stats.show_overlay:
+                # Let the overlay's periodic refresh through on static screens
+                key += (self.stats.frames // OVERLAY_REFRESH_FRAMES,)
+            if r.enabled and key == self._screen_key and not r.full:
+                return
+        if frame is None:
+            frame = self.capture_frame()
+        if key != self._screen_key:
+            r.invalidate()
+        self._screen_key = key
+        # Menu panels are blitted straight to the screen, so only the game scales
+        r.set_scale(self.governor.render_scale if self.state in ("playing", "game_over") else 1)
+        r.begin()
+        lag = 1.0 - alpha
+
+        # Draw entities, one batched blits() call per layer
+        if frame.player is not None:
+            image, px, prev_x, py = frame.player
+            r.blit(image, (round(px - (px - prev_x) * lag), py))
+        # The formation hops in discrete steps by design, so enemies are not interpolated.
+        # Its bounding box stands in for thousands of per-sprite dirty rects.
+        if frame.enemy_box is not None:
+            r.blit_many(frame.enemies, cover=[frame.enemy_box])
+        # Bullets move by vy every step; their previous position is y - vy
+        if lag and frame.bullet_vy:
+            r.blit_many([(img, (x, round(y - vy * lag))) for (img, (x, y)), vy in zip(frame.bullets, frame.bullet_vy)])
+        else:
+            r.blit_many(frame.bullets)
+        frame.particles.draw(r, frame.tick - lag)
 
         # HUD or Screens
-        if self.state == "playing":
-            score_surf = self.font_small.render(f"Skor: {self.score}", True, COLOR_WHITE)
-            level_surf = self.font_small.render(f"Seviye: {self.level}", True, COLOR_WHITE)
-            self.screen.blit(score_surf, (10, 10))
-            self.screen.blit(level_surf, (10, 36))
-            if self.game_over:
-                over = self.font_large.render("GAME OVER", True, COLOR_WHITE)
-                hint = self.font_small.render("Enter: Yeniden baslat | Esc: Menu", True, COLOR_WHITE)
-                self.screen.blit(over, over.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 20)))
-                self.screen.blit(hint, hint.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 20)))
-                self.state = "game_over"
+        if self.state in ("playing", "game_over"):
+            score_surf = text_cache.render(self.font_small, f"Skor: {frame.score}", True, COLOR_WHITE)
+            level_surf = text_cache.render(self.font_small, frame.level_text, True, COLOR_WHITE)
+            r.blit(score_surf, (10, 10))
+            r.blit(level_surf, (10, 36))
+            if self.governor.level:
+                detail_surf = text_cache.render(self.font_small, f"Detay: {GOVERNOR_LABELS[self.governor.level]}", True, COLOR_WHITE)
+                r.blit(detail_surf, detail_surf.get_rect(midtop=(SCREEN_WIDTH // 2, 10)))
+            if frame.game_over:
+                over = text_cache.render(self.font_large, "GAME OVER", True, COLOR_WHITE)
+                hint = text_cache.render(self.font_small, "Enter: Yeniden baslat | Esc: Menu", True, COLOR_WHITE)
+                r.blit(over, over.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 20)))
+                r.blit(hint, hint.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 20)))
         elif self.state == "menu":
-            # Background panel
-            panel = pygame.Rect(SCREEN_WIDTH // 2 - 260, SCREEN_HEIGHT // 2 - 160, 520, 320)
-            draw_panel(self.screen, panel, (20, 20, 40), border=(80, 80, 120))
-            title = self.font_large.render("Space Invaders", True, COLOR_WHITE)
-            self.screen.blit(title, title.get_rect(center=(SCREEN_WIDTH // 2, panel.y + 44)))
-            for i, b in enumerate(self.menu_buttons):
-                b.draw(self.screen, focused=(i == self.menu_focus_idx))
+            overlay = self._overlay("menu", (self.menu_focus_idx,), self.menu_buttons, self._compose_menu)
+            self.screen.blit(overlay, self.menu_panel)
         elif self.state == "settings":
-            panel = pygame.Rect(SCREEN_WIDTH // 2 - 300, SCREEN_HEIGHT // 2 - 180, 600, 360)
-            draw_panel(self.screen, panel, (20, 20, 40), border=(80, 80, 120))
-            title = self.font_large.render("Ayarlar", True, COLOR_WHITE)
-            self.screen.blit(title, title.get_rect(center=(SCREEN_WIDTH // 2, panel.y + 40)))
-            sub = self.font_small.render(f"Zorluk: {self.difficulty}", True, COLOR_WHITE)
-            self.screen.blit(sub, sub.get_rect(center=(SCREEN_WIDTH // 2, panel.y + 90)))
-            for i, b in enumerate(self.settings_buttons):
-                b.draw(self.screen, focused=(i == self.settings_focus_idx))
-            # Volume
-            vol_label = self.font_small.render(f"SFX Ses: {int(self.sfx_volume * 100)}%", True, COLOR_WHITE)
-            self.screen.blit(vol_label, vol_label.get_rect(center=(SCREEN_WIDTH // 2, panel.y + 160)))
-            self.volume_slider.draw(self.screen, focused=(self.settings_focus_idx == 4))
-
-        pygame.display.flip()
+            key = (self.settings_focus_idx, self.difficulty, self.sfx_volume)
+            widgets = self.settings_buttons + [self.volume_slider]
+            overlay = self._overlay("settings", key, widgets, self._compose_settings)
+            self.screen.blit(overlay, self.settings_panel)
+
+        if self.stats.show_overlay:
+            overlay = self.stats.overlay(self.font_stats)
+            r.blit(overlay, (SCREEN_WIDTH - overlay.get_width() - 8, 8))
+
+        r.present()
+        if self.first_frame_ms is None:
+            self.first_frame_ms = (time.perf_counter() - self.start_time) * 1000.0
+            # Time-to-first-frame is always reported, once; the rest of the startup
+            # timings only while frame stats are recording
+            print(f"First frame after {self.first_frame_ms:.0f} ms")
 
 
@@ -3,6 +3,7 @@ import math
 import wave
 import struct
 import pygame
+from asset_bundle import build_bundle
 
 IMAGES = [
     ("player.png", (44, 26)),
@@ -89,6 +90,8 @@ def main() -> None:
     create_images(images_dir)
     create_sounds(sounds_dir)
     print("Placeholder assets generated (where missing).")
+    # Always rebuilt so the bundle matches whatever is on disk now
+    print(f"Asset bundle written to {build_bundle()}.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,110 @@
+from typing import Optional, Tuple
+from settings import (
+    GOVERNOR_FRAME_TARGET_MS,
+    GOVERNOR_DEGRADE_FRAMES,
+    GOVERNOR_RECOVER_FRAMES,
+    GOVERNOR_RECOVER_RATIO,
+    GOVERNOR_BURST_CAP,
+    GOVERNOR_RENDER_SCALE,
+)
+
+# Frame-budget governor. The game reports each frame's cost (update + draw, not
+# the wait for the next tick); while the running average overruns the budget,
+# presentation detail is shed one level at a time, cheapest loss first:
+#
+#   1 capped explosions    at most GOVERNOR_BURST_CAP bursts alive, extra ones are not spawned
+#   2 flashes only         bursts throw no sparks or debris
+#   3 frame skipping       every other frame is not drawn; the simulation still steps
+#   4 low resolution       the world is drawn at 1/GOVERNOR_RENDER_SCALE size and scaled up
+#
+# Levels only touch presentation, never the simulation, so gameplay keeps its
+# speed and replays stay deterministic. Recovery is hysteretic: a level is shed
+# after `degrade_frames` frames over budget, restored after `recover_frames`
+# frames below budget * GOVERNOR_RECOVER_RATIO.
+#
+# Every level but the last only removes work. Low resolution trades it instead
+# (many tiny sprites cost more to shrink than to draw), so that level is on
+# trial: if it has not lowered the average after `degrade_frames` frames it is
+# undone and not tried again until reset().
+
+
+class FrameGovernor:
+    LEVELS = ("full", "capped explosions", "flashes only", "frame skipping", "low resolution")
+    # (live burst cap, particle detail, draw one frame in, render scale) per level
+    SETTINGS: Tuple[Tuple[Optional[int], float, int, int], ...] = (
+        (None, 1.0, 1, 1),
+        (GOVERNOR_BURST_CAP, 1.0, 1, 1),
+        (GOVERNOR_BURST_CAP, 0.0, 1, 1),
+        (GOVERNOR_BURST_CAP, 0.0, 2, 1),
+        (GOVERNOR_BURST_CAP, 0.0, 2, GOVERNOR_RENDER_SCALE),
+    )
+
+    def __init__(self, target_ms: float = GOVERNOR_FRAME_TARGET_MS, degrade_frames: int = GOVERNOR_DEGRADE_FRAMES,
+                 recover_frames: int = GOVERNOR_RECOVER_FRAMES) -> None:
+        self.target_ms = target_ms
+        self.degrade_frames = degrade_frames
+        self.recover_frames = recover_frames
+        self.reset()
+
+    def reset(self) -> None:
+        self.level = 0
+        # Highest level still worth trying; lowered when low resolution did not pay off
+        self.ceiling = len(self.LEVELS) - 1
+        self.avg_ms = 0.0
+        self._over = self._under = 0
+        # Average cost before low resolution was tried, and frames left until it is judged
+        self._before_ms = 0.0
+        self._trial = 0
+
+    @property
+    def name(self) -> str:
+        return self.LEVELS[self.level]
+
+    @property
+    def burst_cap(self) -> Optional[int]:
+        return self.SETTINGS[self.level][0]
+
+    @property
+    def particle_detail(self) -> float:
+        return self.SETTINGS[self.level][1]
+
+    @property
+    def render_every(self) -> int:
+        return self.SETTINGS[self.level][2]
+
+    @property
+    def render_scale(self) -> int:
+        return self.SETTINGS[self.level][3]
+
+    def observe(self, frame_ms: float) -> bool:
+        # Returns True when the level changed. Report a skipped frame's cost as if
+        # it had been drawn, or frame skipping would read as headroom.
+        self.avg_ms += (frame_ms - self.avg_ms) * 0.1
+        if self._trial:
+            self._trial -= 1
+            if not self._trial and self.avg_ms >= self._before_ms:
+                self.level -= 1
+                self.ceiling = self.level
+                self._over = self._under = 0
+                return True
+        if self.avg_ms > self.target_ms:
+            self._over += 1
+            self._under = 0
+            if self._over >= self.degrade_frames and self.level < self.ceiling:
+                self.level += 1
+                if self.level == len(self.LEVELS) - 1:
+                    self._before_ms = self.avg_ms
+                    self._trial = self.degrade_frames
+                self._over = 0
+                return True
+        elif self.avg_ms < self.target_ms * GOVERNOR_RECOVER_RATIO:
+            self._under += 1
+            self._over = 0
+            if self._under >= self.recover_frames and self.level > 0:
+                self.level -= 1
+                self._under = 0
+                self._trial = 0
+                return True
+        else:
+            self._over = self._under = 0
+        return False
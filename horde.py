@@ -0,0 +1,148 @@
+from __future__ import annotations
+import pygame
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from settings import (
+    SCREEN_WIDTH,
+    ENEMY_MOVE_INTERVAL_MS,
+    ENEMY_SHOOT_CHANCE,
+    HORDE_SPACING,
+    HORDE_WAVES,
+    HORDE_MOVE_INTERVAL_MS,
+    HORDE_SHOOT_CHANCE,
+    HORDE_HMOVE_PIXELS,
+    HORDE_VMOVE_PIXELS,
+    HORDE_TOP_Y,
+    HORDE_WAVE_GAP,
+    HORDE_ENTRY_PIXELS,
+    HORDE_DRIFT_INTERVAL_MS,
+    HORDE_MAX_ENEMIES,
+)
+from entities import FormationLayout
+
+# Horde (endless) mode: instead of one formation per level, formations stream in
+# from above the screen as waves of up to a few thousand enemies each. Every wave
+# is an ordinary origin-relative formation, so moving it is one origin update and
+# its collisions cost what its bullets cost; the Horde itself only scrolls the
+# waves in, keeps a gap between them and sums them up behind the formation API.
+
+
+# Spawn patterns: is slot (row, col) of a rows x cols wave occupied?
+PATTERNS: Dict[str, Callable[[int, int, int, int], bool]] = {
+    "block": lambda r, c, rows, cols: True,
+    "checker": lambda r, c, rows, cols: (r + c) % 2 == 0,
+    "diamond": lambda r, c, rows, cols: abs(2 * r - rows + 1) / rows + abs(2 * c - cols + 1) / cols <= 1.0,
+    "stripes": lambda r, c, rows, cols: r % 3 != 2,
+    "columns": lambda r, c, rows, cols: c % 4 < 2,
+}
+
+
+def pattern_alive(name: str, rows: int, cols: int) -> List[bool]:
+    # Initial alive flags of a wave, row-major like the formation's slots
+    fits = PATTERNS[name]
+    return [fits(i // cols, i % cols, rows, cols) for i in range(rows * cols)]
+
+
+class Horde:
+    # Drop-in for EnemyFormation (update, collisions, bottom check, draw_items,
+    # bounds) over a list of waves, oldest (lowest) first. Endless: all_dead() is
+    # never true, so the simulation never levels up.
+    #
+    # make_formation(image, rows, cols, **kwargs) builds one wave on the
+    # simulation's backend, sharing its RNG; waves update in list order, so the
+    # random stream is consumed the same way on both backends.
+
+    def __init__(self, make_formation: Callable[..., object], image: pygame.Surface,
+                 mask: Optional[pygame.mask.Mask] = None, waves: Sequence[dict] = HORDE_WAVES) -> None:
+        self.make_formation = make_formation
+        self.image = image
+        self.mask = mask
+        self.specs = waves
+        self.waves: List = []
+        self.wave = 0  # waves spawned so far
+        # Set by Simulation.apply_difficulty; waves scale their speed and fire by
+        # these relative to the Normal preset
+        self.move_interval_ms = ENEMY_MOVE_INTERVAL_MS
+        self.shoot_chance = ENEMY_SHOOT_CHANCE
+        self.last_drift_time = 0
+
+    @property
+    def alive_count(self) -> int:
+        return sum(f.alive_count for f in self.waves)
+
+    @property
+    def enemies(self) -> List:
+        return [e for f in self.waves for e in f.enemies]
+
+    def _spawn_wave(self) -> None:
+        spec = self.specs[self.wave % len(self.specs)]
+        cycle = self.wave // len(self.specs)
+        rows, cols = spec["rows"], spec["cols"]
+        dx, dy = HORDE_SPACING
+        layout = FormationLayout((SCREEN_WIDTH - (cols - 1) * dx - self.image.get_width()) // 2, 0, dx, dy)
+        f = self.make_formation(self.image, rows, cols, mask=self.mask, layout=layout,
+                                alive=pattern_alive(spec["pattern"], rows, cols),
+                                hmove=HORDE_HMOVE_PIXELS, vmove=HORDE_VMOVE_PIXELS)
+        interval = spec.get("move_interval_ms", HORDE_MOVE_INTERVAL_MS) * self.move_interval_ms / ENEMY_MOVE_INTERVAL_MS
+        f.move_interval_ms = max(50, int(interval * 0.94 ** cycle))
+        f.shoot_chance = spec.get("shoot_chance", HORDE_SHOOT_CHANCE) * self.shoot_chance / ENEMY_SHOOT_CHANCE * 1.06 ** cycle
+        f.direction = 1 if self.wave % 2 == 0 else -1
+        self.wave += 1
+        box = f.bounds()
+        if box is None:
+            return
+        # Enter from just above the screen, behind the newest wave
+        bottom = 0
+        if self.waves:
+            bottom = min(bottom, self.waves[-1].bounds().top - HORDE_WAVE_GAP)
+        f.origin_y = bottom - box.bottom
+        self.waves.append(f)
+
+    def _stream(self, now_ms: int) -> None:
+        waves = self.waves
+        if not waves or (waves[-1].bounds().top >= 0 and self.alive_count < HORDE_MAX_ENEMIES):
+            self._spawn_wave()
+        drift = now_ms - self.last_drift_time >= HORDE_DRIFT_INTERVAL_MS
+        if drift:
+            self.last_drift_time = now_ms
+        # Waves still entering scroll in until their top row reaches HORDE_TOP_Y,
+        # but never closer than HORDE_WAVE_GAP to the wave ahead; all creep down
+        limit = None
+        for f in waves:
+            box = f.bounds()
+            step = HORDE_TOP_Y - box.top
+            if limit is not None:
+                step = min(step, limit - box.bottom)
+            step = max(min(HORDE_ENTRY_PIXELS, step), int(drift))
+            f.origin_y += step
+            limit = box.top + step - HORDE_WAVE_GAP
+
+    def update(self, now_ms: int, bullets) -> None:
+        self._stream(now_ms)
+        for f in self.waves:
+            f.update(now_ms, bullets)
+
+    def check_collision_with_bullets(self, bullets, grid=None, bullet_mask: Optional[pygame.mask.Mask] = None) -> int:
+        # Waves resolve oldest first; a bullet spent on one wave is dead for the next
+        score = 0
+        for f in self.waves:
+            score += f.check_collision_with_bullets(bullets, grid, bullet_mask)
+        if score:
+            self.waves = [f for f in self.waves if f.alive_count]
+        return score
+
+    def draw_items(self) -> List[Tuple[pygame.Surface, Tuple[int, int]]]:
+        items = []
+        for f in self.waves:
+            items.extend(f.draw_items())
+        return items
+
+    def bounds(self) -> Optional[pygame.Rect]:
+        boxes = [f.bounds() for f in self.waves]
+        return boxes[0].unionall(boxes[1:]) if boxes else None
+
+    def any_reached_bottom(self) -> bool:
+        return any(f.any_reached_bottom() for f in self.waves)
+
+    def all_dead(self) -> bool:
+        return False
+
@@ -1,11 +1,36 @@
-from game import Game
+import argparse
+import sys
+import time
+from typing import List, Optional
 
+# Taken before pygame and the game modules are imported, so the first-frame
+# report covers the whole startup
+START_TIME = time.perf_counter()
 
-def main() -> None:
-    Game().run()
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Space Invaders")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="time startup up to the first frame, print a breakdown and exit")
+    parser.add_argument("--profile-json", metavar="PATH", help="also write the startup breakdown as JSON")
+    parser.add_argument("--budget-ms", type=float,
+                        help="exit with status 1 if the first frame is later (default: settings.STARTUP_BUDGET_MS)")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="step the simulation on its own thread (default: settings.PIPELINED_SIM)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.profile_startup:
+        from startup_profile import profile_startup
+        return profile_startup(START_TIME, args.budget_ms, args.profile_json)
+    from game import Game
+    Game(start_time=START_TIME).run(pipelined=True if args.pipelined else None)
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
 
 
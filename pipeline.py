@@ -0,0 +1,94 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+import pygame
+from settings import SIM_HZ
+from effects import ParticleSystem
+
+# Pipelined mode (settings.PIPELINED_SIM, `main.py --pipelined`): the simulation
+# steps on its own thread and publishes an immutable Frame after every batch of
+# steps; the main thread keeps SDL event pumping, input and all drawing (SDL wants
+# video calls on the thread that created the window) and draws whichever Frame
+# was published last. Publishing swaps one reference, so the frame being drawn
+# and the one being built never share mutable state: double buffering without
+# copying the simulation. pygame releases the GIL inside blits and display
+# updates, so stepping overlaps presentation instead of waiting behind it.
+#
+# Game.lock serialises the two threads' access to the simulation: the simulation
+# thread holds it while stepping and capturing, the main thread while handling
+# events (which may reset, rewind or reconfigure the game).
+
+Sprite = Tuple[pygame.Surface, Tuple[int, int]]
+
+
+@dataclass(frozen=True)
+class Frame:
+    # Everything Game.draw shows of the world at one point of the simulation.
+    # Built fresh by Game.capture_frame and never mutated once published.
+    tick: int
+    steps: int  # simulation steps run since the previous frame
+    player: Optional[Tuple[pygame.Surface, int, int, int]]  # image, x, previous x, y
+    enemies: List[Sprite]
+    enemy_box: Optional[pygame.Rect]
+    bullets: List[Sprite]
+    bullet_vy: List[int]
+    particles: ParticleSystem
+    score: int
+    level_text: str
+    game_over: bool
+    # Unsimulated time when captured and whether the world was running, for
+    # interpolating between this step and the previous one
+    accumulator_ms: float
+    interpolate: bool
+    captured_at: float  # perf_counter()
+
+
+class SimulationThread:
+    # Runs Game.advance on its own clock, sleeping until the next step is due,
+    # and publishes a Frame every iteration. `keys` is the latest keyboard state
+    # from the main thread (pygame.key.get_pressed() returns a fresh immutable
+    # sequence, so it can be handed over as is).
+
+    def __init__(self, game) -> None:
+        self.game = game
+        self.keys = None
+        self.frame: Optional[Frame] = None
+        self.work_ms = 0.0  # cost of the last iteration (steps + capture)
+        # Running totals, for the main thread's frame stats (it records deltas)
+        self.steps_total = 0
+        self.work_total_ms = 0.0
+        self.error: Optional[BaseException] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="simulation", daemon=True)
+
+    def start(self) -> "SimulationThread":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        game = self.game
+        clock = time.perf_counter
+        step_ms = 1000.0 / SIM_HZ
+        last = clock()
+        try:
+            while not self._stop.is_set():
+                start = clock()
+                dt_ms = (start - last) * 1000.0
+                last = start
+                keys = self.keys
+                with game.lock:
+                    steps = game.advance(dt_ms, keys)[0] if keys is not None else 0
+                    self.frame = game.capture_frame(steps, detach=True)
+                    due_ms = (step_ms - game.accumulator_ms) / game.time_scale
+                self.work_ms = (clock() - start) * 1000.0
+                self.steps_total += steps
+                self.work_total_ms += self.work_ms
+                time.sleep(max(0.0005, (due_ms - self.work_ms) / 1000.0))
+        except BaseException as exc:
+            # Surfaced by the main thread (Game.run), which owns the window
+            self.error = exc
@@ -0,0 +1,162 @@
+import weakref
+import pygame
+from typing import List, Optional, Sequence, Tuple
+from settings import SCREEN_WIDTH, SCREEN_HEIGHT, DIRTY_TILE_SIZE
+
+
+# Surface.fblits (pygame-ce) skips building the result list entirely
+_fblits = getattr(pygame.Surface, "fblits", None)
+
+
+def coalesce(rects: List[pygame.Rect], tile: int = DIRTY_TILE_SIZE) -> List[pygame.Rect]:
+    # Snap rects to a coarse tile grid and merge dirty tiles into horizontal runs.
+    # Far fewer fill/update calls than one per sprite; the area is slightly larger.
+    cols = (SCREEN_WIDTH + tile - 1) // tile
+    rows = (SCREEN_HEIGHT + tile - 1) // tile
+    dirty = set()
+    add = dirty.add
+    for x, y, w, h in rects:
+        x0 = x // tile if x > 0 else 0
+        x1 = (x + w - 1) // tile
+        y0 = y // tile if y > 0 else 0
+        y1 = (y + h - 1) // tile
+        if x1 >= cols:
+            x1 = cols - 1
+        if y1 >= rows:
+            y1 = rows - 1
+        if x0 == x1 and y0 == y1:
+            add(y0 * cols + x0)
+            continue
+        for ty in range(y0, y1 + 1):
+            base = ty * cols
+            for tx in range(x0, x1 + 1):
+                add(base + tx)
+    out = []
+    run_start = run_end = -2
+    for t in sorted(dirty):
+        if t == run_end + 1 and t // cols == run_start // cols:
+            run_end = t
+            continue
+        if run_start >= 0:
+            out.append(_run_rect(run_start, run_end, cols, tile))
+        run_start = run_end = t
+    if run_start >= 0:
+        out.append(_run_rect(run_start, run_end, cols, tile))
+    return out
+
+
+def _run_rect(start: int, end: int, cols: int, tile: int) -> pygame.Rect:
+    y, x0 = divmod(start, cols)
+    x1 = end % cols
+    return pygame.Rect(x0 * tile, y * tile, (x1 - x0 + 1) * tile, tile).clip(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+
+
+class DirtyRectRenderer:
+    # Tracks the screen area every sprite covered last frame and this frame so only
+    # those rects are cleared and pushed to the display. A full-screen fill + flip
+    # happens only after invalidate() (state change, first frame) or when disabled.
+    # Everything visible must be redrawn through blit()/mark() each frame, since
+    # cleared areas are snapped to tiles and may cover neighbouring sprites.
+    #
+    # At a render scale above 1 everything is drawn into a surface that much
+    # smaller, with sprites shrunk once and cached, and scaled up to the display
+    # in present(). That pays off for fill-bound frames (large or alpha sprites);
+    # the whole screen is presented every frame then.
+
+    def __init__(self, screen: pygame.Surface, background: Tuple[int, int, int], enabled: bool = True) -> None:
+        self.screen = screen
+        self.background = background
+        self.enabled = enabled
+        self.full = True
+        self.rects: List[pygame.Rect] = []
+        # Coalesced areas presented last frame; cleared at the start of this one
+        self.prev_runs: List[pygame.Rect] = []
+        # Reduced resolution: the surface drawn into, and each sprite shrunk to it
+        self.scale = 1
+        self._target = screen
+        self._shrunk = weakref.WeakKeyDictionary()
+
+    def set_scale(self, scale: int) -> None:
+        if scale == self.scale:
+            return
+        self.scale = scale
+        self._shrunk.clear()
+        w, h = self.screen.get_size()
+        self._target = self.screen if scale == 1 else pygame.Surface((w // scale, h // scale)).convert()
+        self.full = True
+
+    def _shrink(self, image: pygame.Surface) -> pygame.Surface:
+        small = self._shrunk.get(image)
+        if small is None:
+            s = self.scale
+            w, h = image.get_size()
+            small = pygame.transform.scale(image, (max(1, w // s), max(1, h // s)))
+            self._shrunk[image] = small
+        return small
+
+    def _scaled(self, items: Sequence[Tuple[pygame.Surface, object]]) -> List[Tuple[pygame.Surface, Tuple[int, int]]]:
+        s = self.scale
+        shrink = self._shrink
+        return [(shrink(img), (x // s, y // s)) for img, (x, y) in items]
+
+    def invalidate(self) -> None:
+        self.full = True
+
+    def begin(self) -> None:
+        if self.scale != 1:
+            self._target.fill(self.background)
+        elif self.full or not self.enabled:
+            self.screen.fill(self.background)
+        else:
+            fill = self.screen.fill
+            bg = self.background
+            for r in self.prev_runs:
+                fill(bg, r)
+        self.rects = []
+
+    def blit(self, image: pygame.Surface, dest) -> pygame.Rect:
+        if self.scale != 1:
+            s = self.scale
+            return self._target.blit(self._shrink(image), (dest[0] // s, dest[1] // s))
+        r = self.screen.blit(image, dest)
+        self.rects.append(r)
+        return r
+
+    def blit_many(self, items: Sequence[Tuple[pygame.Surface, object]],
+                  cover: Optional[List[pygame.Rect]] = None) -> None:
+        # One C-level call per layer instead of one Python call per sprite.
+        # cover: rects known to contain every sprite (e.g. a particle field's
+        # tiles), registered instead of the one rect per sprite blits() returns.
+        if not items:
+            return
+        if self.scale != 1:
+            self._target.blits(self._scaled(items), doreturn=False)
+            return
+        if self.enabled and cover is None:
+            self.rects.extend(self.screen.blits(items))
+            return
+        if self.enabled:
+            self.rects.extend(cover)
+        if _fblits is not None:
+            _fblits(self.screen, items)
+        else:
+            self.screen.blits(items, doreturn=False)
+
+    def mark(self, rect: pygame.Rect) -> None:
+        # Register area drawn by other means (e.g. an effect's own draw())
+        self.rects.append(pygame.Rect(rect))
+
+    def present(self) -> None:
+        if self.scale != 1:
+            pygame.transform.scale(self._target, self.screen.get_size(), self.screen)
+            pygame.display.flip()
+            self.prev_runs = []
+            return
+        runs = coalesce(self.rects) if self.enabled else []
+        if self.full or not self.enabled:
+            pygame.display.flip()
+            self.full = False
+        else:
+            # Old positions were cleared in begin(); new ones may lie outside those tiles
+            pygame.display.update(self.prev_runs + runs)
+        self.prev_runs = runs
@@ -0,0 +1,223 @@
+import argparse
+import os
+import struct
+import sys
+import time
+from typing import Iterator, List, Optional, Tuple
+from settings import SIM_HZ, REPLAY_DIR, REPLAY_KEEP
+from assets_loader import Assets
+from simulation import Simulation, InputState
+
+# Input recordings: the seed, difficulty and mode a game started with plus one input
+# bitmask (InputState.to_mask) per simulation tick, run-length encoded. Since
+# Simulation is driven only by its seeded RNG and the inputs, replaying the
+# stream reproduces the game tick for tick.
+#
+#   magic "SIRP" | version u8 | sim_hz u16 | seed u64 | ticks u32 | score u32 |
+#   level u16 | game_over u8 | horde u8 | difficulty (u8 length + utf-8) | runs...
+#
+# Each run is the mask byte followed by its length as a LEB128 varint.
+# ticks/score/level/game_over describe the end of the recording and are what a
+# replay is checked against.
+#
+#   python replay.py replays/replay_20240101_120000.bin            # headless, max speed
+#   python replay.py replays/replay_20240101_120000.bin --speed 4  # on screen at 4x
+
+MAGIC = b"SIRP"
+VERSION = 3  # 2: pixel-mask collisions, 3: horde flag
+_HEADER = struct.Struct("<4sBHQIIHBB")
+SPEEDS = (1, 4, 16)
+
+
+class InputRecorder:
+    def __init__(self, seed: int, difficulty: str, horde: bool = False) -> None:
+        self.seed = seed
+        self.difficulty = difficulty
+        self.horde = horde
+        self.runs: List[List[int]] = []  # [mask, count]
+        self.ticks = 0
+
+    def record(self, inputs: InputState) -> None:
+        mask = inputs.to_mask()
+        runs = self.runs
+        if runs and runs[-1][0] == mask:
+            runs[-1][1] += 1
+        else:
+            runs.append([mask, 1])
+        self.ticks += 1
+
+    def truncate(self, ticks: int) -> None:
+        # Forget inputs past `ticks` (after a rewind the game continues from there)
+        excess = self.ticks - ticks
+        runs = self.runs
+        while excess > 0 and runs:
+            if runs[-1][1] > excess:
+                runs[-1][1] -= excess
+                break
+            excess -= runs.pop()[1]
+        self.ticks = min(self.ticks, ticks)
+
+    def to_replay(self, sim: Simulation) -> "Replay":
+        # Snapshot of the recording so far, checked against sim's current state
+        return Replay(self.seed, self.difficulty, [(m, c) for m, c in self.runs],
+                      sim.tick, sim.score, sim.level, sim.game_over, horde=self.horde)
+
+    def save(self, sim: Simulation, directory: str = REPLAY_DIR, keep: int = REPLAY_KEEP) -> Optional[str]:
+        if not self.ticks:
+            return None
+        # Named by time and seed; a clash (same game saved twice in a second,
+        # e.g. after a rewind) gets a counter instead of overwriting
+        os.makedirs(directory, exist_ok=True)
+        stem = os.path.join(directory, time.strftime("replay_%Y%m%d_%H%M%S") + f"_{self.seed:x}")
+        data = self.to_replay(sim).to_bytes()
+        n = 0
+        while True:
+            path = f"{stem}_{n}.bin" if n else f"{stem}.bin"
+            try:
+                with open(path, "xb") as f:
+                    f.write(data)
+                break
+            except FileExistsError:
+                n += 1
+        _prune(directory, keep)
+        return path
+
+
+def _prune(directory: str, keep: int) -> None:
+    # Delete all but the `keep` newest recordings, so the directory cannot grow forever
+    names = [n for n in os.listdir(directory) if n.startswith("replay_") and n.endswith(".bin")]
+    if len(names) <= keep:
+        return
+    paths = sorted((os.path.join(directory, n) for n in names), key=os.path.getmtime)
+    for path in paths[:len(paths) - keep]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class Replay:
+    def __init__(self, seed: int, difficulty: str, runs: List[Tuple[int, int]],
+                 ticks: int, score: int, level: int, game_over: bool, sim_hz: int = SIM_HZ,
+                 horde: bool = False) -> None:
+        self.seed = seed
+        self.difficulty = difficulty
+        self.runs = runs
+        self.ticks = ticks
+        self.score = score
+        self.level = level
+        self.game_over = game_over
+        self.sim_hz = sim_hz
+        self.horde = horde
+
+    def to_bytes(self) -> bytes:
+        name = self.difficulty.encode()
+        out = bytearray(_HEADER.pack(MAGIC, VERSION, self.sim_hz, self.seed, self.ticks, self.score,
+                                     self.level, self.game_over, self.horde))
+        out.append(len(name))
+        out += name
+        for mask, count in self.runs:
+            out.append(mask)
+            while count >= 0x80:
+                out.append(count & 0x7F | 0x80)
+                count >>= 7
+            out.append(count)
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Replay":
+        magic, version, sim_hz, seed, ticks, score, level, game_over, horde = _HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("not a replay file")
+        if version != VERSION:
+            raise ValueError(f"unsupported replay version {version}")
+        pos = _HEADER.size
+        n = data[pos]
+        difficulty = data[pos + 1:pos + 1 + n].decode()
+        pos += 1 + n
+        runs = []
+        while pos < len(data):
+            mask = data[pos]
+            count = shift = 0
+            while True:
+                pos += 1
+                byte = data[pos]
+                count |= (byte & 0x7F) << shift
+                shift += 7
+                if byte < 0x80:
+                    break
+            pos += 1
+            runs.append((mask, count))
+        return cls(seed, difficulty, runs, ticks, score, level, bool(game_over), sim_hz, bool(horde))
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: str) -> "Replay":
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+    def inputs(self) -> Iterator[InputState]:
+        states = [InputState.from_mask(m) for m in range(8)]
+        for mask, count in self.runs:
+            state = states[mask]
+            for _ in range(count):
+                yield state
+
+    def check(self, sim: Simulation) -> List[str]:
+        # Differences between the recorded outcome and sim; empty when reproduced
+        diffs = []
+        for key in ("tick", "score", "level", "game_over"):
+            expected = self.ticks if key == "tick" else getattr(self, key)
+            if getattr(sim, key) != expected:
+                diffs.append(f"{key}: recorded {expected}, replayed {getattr(sim, key)}")
+        return diffs
+
+
+def run_headless(replay: Replay, backend: str = "objects") -> Simulation:
+    if backend == "numpy":
+        from soa import ArraySimulation
+        assets = Assets()
+        assets.load_images()
+        sim = ArraySimulation(assets.images, replay.difficulty, replay.seed, masks=assets.masks, horde=replay.horde)
+    else:
+        sim = Simulation.headless(replay.difficulty, replay.seed, horde=replay.horde)
+    step = sim.step
+    for inputs in replay.inputs():
+        step(inputs)
+    return sim
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Play back a recorded game")
+    parser.add_argument("path")
+    parser.add_argument("--speed", type=int, choices=SPEEDS, help="play on screen at this speed (default: headless, max speed)")
+    parser.add_argument("--backend", default="objects", choices=["objects", "numpy"], help="headless simulation backend")
+    args = parser.parse_args(argv)
+
+    replay = Replay.load(args.path)
+    if replay.sim_hz != SIM_HZ:
+        print(f"Recorded at SIM_HZ={replay.sim_hz}, this build runs {SIM_HZ}; cannot reproduce")
+        return 1
+    if args.speed:
+        from game import Game
+        game = Game()
+        game.start_replay(replay, args.speed)
+        game.run()
+        return 0 if game.replay_result == [] else 1
+
+    start = time.perf_counter()
+    sim = run_headless(replay, args.backend)
+    elapsed = time.perf_counter() - start
+    diffs = replay.check(sim)
+    print(f"{replay.ticks} ticks in {elapsed:.3f}s ({replay.ticks / elapsed if elapsed else 0:,.0f} ticks/s): "
+          f"score {sim.score}, level {sim.level}")
+    for line in diffs:
+        print("MISMATCH " + line)
+    return 1 if diffs else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional
+from settings import DIFFICULTY_PRESETS, SCREEN_HEIGHT
+from frame_stats import percentile
+from simulation import Simulation, InputState
+
+# Fans headless episodes out over a process pool, e.g.
+#   python run_episodes.py --episodes 200 --difficulty all --policy scripted
+
+Policy = Callable[[Simulation], InputState]
+
+
+@lru_cache(maxsize=None)
+def _images():
+    # Loaded once per worker process
+    return Simulation.headless().images
+
+
+def make_random_policy(seed: int) -> Policy:
+    rng = random.Random(seed ^ 0x5EED)
+    state = {"action": InputState(), "hold": 0}
+
+    def policy(sim: Simulation) -> InputState:
+        # Hold each random action for a few frames so the player actually travels
+        if state["hold"] <= 0:
+            a = rng.randrange(6)
+            state["action"] = InputState(left=a in (1, 4), right=a in (2, 5), fire=a >= 3)
+            state["hold"] = rng.randint(4, 20)
+        state["hold"] -= 1
+        return state["action"]
+
+    return policy
+
+
+def make_scripted_policy(seed: int) -> Policy:
+    def policy(sim: Simulation) -> InputState:
+        player = sim.player.rect
+        # Dodge the closest enemy bullet heading for the player
+        threat = None
+        for b in sim.bullets:
+            if b.alive and not b.from_player and b.rect.bottom > SCREEN_HEIGHT - 200 and abs(b.rect.centerx - player.centerx) < player.w:
+                if threat is None or b.rect.bottom > threat.rect.bottom:
+                    threat = b
+        if threat is not None:
+            go_left = threat.rect.centerx >= player.centerx
+            return InputState(left=go_left, right=not go_left, fire=True)
+        # Otherwise chase the lowest live enemy and keep firing
+        target = None
+        for e in sim.enemies.enemies:
+            if e.alive and (target is None or e.rect.bottom > target.rect.bottom):
+                target = e
+        if target is None:
+            return InputState(fire=True)
+        dx = target.rect.centerx - player.centerx
+        return InputState(left=dx < -4, right=dx > 4, fire=True)
+
+    return policy
+
+
+POLICIES: Dict[str, Callable[[int], Policy]] = {
+    "random": make_random_policy,
+    "scripted": make_scripted_policy,
+}
+
+
+def run_episode(seed: int, difficulty: str, policy: str, max_frames: int, backend: str = "objects") -> Dict:
+    if backend == "numpy":
+        from soa import ArraySimulation
+        sim = ArraySimulation(_images(), difficulty, seed)
+    else:
+        sim = Simulation(_images(), difficulty, seed)
+    act = POLICIES[policy](seed)
+    start = time.perf_counter()
+    while not sim.game_over and sim.tick < max_frames:
+        sim.step(act(sim))
+    return {
+        "seed": seed,
+        "difficulty": difficulty,
+        "policy": policy,
+        "score": sim.score,
+        "level": sim.level,
+        "frames": sim.tick,
+        "game_over": sim.game_over,
+        "wall_s": time.perf_counter() - start,
+    }
+
+
+def summarize(results: List[Dict], elapsed_s: float) -> Dict:
+    summary = {}
+    for diff in sorted({r["difficulty"] for r in results}):
+        rows = [r for r in results if r["difficulty"] == diff]
+        entry = {"episodes": len(rows)}
+        for key in ("score", "level", "frames"):
+            vals = [r[key] for r in rows]
+            entry[key] = {
+                "mean": sum(vals) / len(vals),
+                "p50": percentile(vals, 50),
+                "p90": percentile(vals, 90),
+                "p99": percentile(vals, 99),
+                "max": max(vals),
+            }
+        summary[diff] = entry
+    frames = sum(r["frames"] for r in results)
+    summary["throughput"] = {
+        "elapsed_s": elapsed_s,
+        "episodes_per_s": len(results) / elapsed_s if elapsed_s else 0.0,
+        "frames_per_s": frames / elapsed_s if elapsed_s else 0.0,
+    }
+    return summary
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run headless episodes across a process pool")
+    parser.add_argument("--episodes", type=int, default=100, help="episodes per difficulty")
+    parser.add_argument("--difficulty", default="Normal", choices=list(DIFFICULTY_PRESETS) + ["all"])
+    parser.add_argument("--policy", default="scripted", choices=list(POLICIES))
+    parser.add_argument("--seed", type=int, default=0, help="episode i uses seed + i")
+    parser.add_argument("--max-frames", type=int, default=60 * 60 * 10)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--backend", default="objects", choices=["objects", "numpy"])
+    parser.add_argument("--json", metavar="PATH", help="write per-episode results and summary")
+    parser.add_argument("--quiet", action="store_true", help="do not stream per-episode lines")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    difficulties = list(DIFFICULTY_PRESETS) if args.difficulty == "all" else [args.difficulty]
+    jobs = [(args.seed + i, diff) for diff in difficulties for i in range(args.episodes)]
+
+    results: List[Dict] = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(run_episode, seed, diff, args.policy, args.max_frames, args.backend) for seed, diff in jobs]
+        for fut in as_completed(futures):
+            r = fut.result()
+            results.append(r)
+            if not args.quiet:
+                print(f"[{len(results)}/{len(jobs)}] {r['difficulty']:<6} seed={r['seed']:<6} score={r['score']:<6} "
+                      f"level={r['level']:<3} frames={r['frames']:<6} {r['wall_s'] * 1000:.0f} ms", flush=True)
+    elapsed = time.perf_counter() - start
+    results.sort(key=lambda r: (r["difficulty"], r["seed"]))
+    summary = summarize(results, elapsed)
+
+    for diff in difficulties:
+        s = summary[diff]
+        print(f"{diff}: {s['episodes']} episodes | score mean {s['score']['mean']:.0f} p50 {s['score']['p50']:.0f} "
+              f"p90 {s['score']['p90']:.0f} | level mean {s['level']['mean']:.2f} max {s['level']['max']} | "
+              f"frames mean {s['frames']['mean']:.0f} p99 {s['frames']['p99']:.0f}")
+    t = summary["throughput"]
+    print(f"{len(results)} episodes in {t['elapsed_s']:.2f}s ({t['episodes_per_s']:.1f} ep/s, {t['frames_per_s']:,.0f} frames/s)")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "summary": summary, "episodes": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,27 @@
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
-FPS = 60
+FPS = 60  # render rate cap
+# Fixed simulation rate; gameplay speed does not depend on FPS
+SIM_HZ = 60
+# Max simulation steps run in one rendered frame before the backlog is dropped
+MAX_CATCHUP_STEPS = 5
+# Draw player and bullets between the last two simulation states
+RENDER_INTERPOLATION = True
+# Step the simulation on its own thread, overlapping drawing and display updates
+# (pipeline.py); `main.py --pipelined` turns it on for one run
+PIPELINED_SIM = False
+# Redraw and present only the rects sprites covered (False: full fill + flip)
+DIRTY_RECTS = True
+DIRTY_TILE_SIZE = 64
+# Frame budget; while the average frame overruns it, presentation detail is shed
+# step by step (see governor.py) and restored once there is headroom again
+GOVERNOR_ENABLED = True
+GOVERNOR_FRAME_TARGET_MS = 1000 / FPS
+GOVERNOR_DEGRADE_FRAMES = 30  # frames over budget before shedding a level
+GOVERNOR_RECOVER_FRAMES = 120  # frames with headroom before restoring one
+GOVERNOR_RECOVER_RATIO = 0.7  # headroom: average below this share of the budget
+GOVERNOR_BURST_CAP = 12  # live explosion bursts once capped (a player's death always shows)
+GOVERNOR_RENDER_SCALE = 2  # the world is drawn at 1/N resolution at the last level
 
 # Player
 PLAYER_SPEED = 6
@@ -9,6 +30,8 @@ PLAYER_SHOOT_COOLDOWN_MS = 300
 # Bullets
 BULLET_SPEED = -10
 ENEMY_BULLET_SPEED = 5
+# Preallocated bullet records (object backend); shots beyond this are dropped
+BULLET_POOL_CAPACITY = 4096
 
 # Enemies
 ENEMY_ROWS = 5
@@ -21,6 +44,37 @@ ENEMY_VMOVE_PIXELS = 20
 ENEMY_MOVE_INTERVAL_MS = 500
 ENEMY_SHOOT_CHANCE = 0.003
 
+# Horde mode (endless): formations stream in from above as waves, cycling through
+# HORDE_WAVES; pattern names are the keys of horde.PATTERNS. Sprites are scaled
+# down so thousands fit on screen. Each pass through the list is faster and
+# fires more, like a level. A wave may override move_interval_ms / shoot_chance.
+HORDE_ENEMY_SIZE = (9, 6)
+HORDE_SPACING = (12, 9)  # slot pitch, x and y
+HORDE_WAVES = (
+    {"pattern": "block", "rows": 12, "cols": 52},
+    {"pattern": "checker", "rows": 24, "cols": 56},
+    {"pattern": "diamond", "rows": 36, "cols": 56},
+    {"pattern": "stripes", "rows": 24, "cols": 52},
+    {"pattern": "columns", "rows": 30, "cols": 56},
+)
+HORDE_MOVE_INTERVAL_MS = 200
+HORDE_SHOOT_CHANCE = 0.003  # per column and step
+HORDE_HMOVE_PIXELS = 6
+HORDE_VMOVE_PIXELS = 9
+HORDE_TOP_Y = 70  # entering waves stop here (below the HUD)
+HORDE_WAVE_GAP = 18  # vertical gap kept behind the wave ahead while entering
+HORDE_ENTRY_PIXELS = 2  # scroll-in speed per step
+HORDE_DRIFT_INTERVAL_MS = 200  # every wave creeps down 1 px this often
+HORDE_MAX_ENEMIES = 6000  # no new wave while this many are alive
+HORDE_PLAYER_COOLDOWN_MS = 100
+
+# Collision broad phase (spatial hash cell size in pixels)
+SPATIAL_CELL_SIZE = 64
+
+# Simulation backend: "objects" (entities.py) or "numpy" (soa.py, needs numpy:
+# requirements-optional.txt)
+SIM_BACKEND = "objects"
+
 # Colors
 COLOR_BG = (10, 10, 20)
 COLOR_WHITE = (240, 240, 240)
@@ -32,6 +86,36 @@ COLOR_YELLOW = (250, 220, 70)
 ASSETS_DIR = "assets"
 IMAGES_DIR = f"{ASSETS_DIR}/images"
 SOUNDS_DIR = f"{ASSETS_DIR}/sounds"
+# Packed sprite atlas + decoded sounds (built by generate_placeholders.py)
+ASSET_BUNDLE_PATH = f"{ASSETS_DIR}/bundle.bin"
+
+# Per-phase frame timing ring buffer (F3: overlay, F4: dump to CSV/JSON)
+FRAME_STATS_CAPACITY = 600
+FRAME_STATS_ENABLED = False  # record from startup instead of from the first F3
+
+# Every game's inputs are saved here on game over / quit (see replay.py)
+RECORD_REPLAYS = True
+REPLAY_DIR = "replays"
+REPLAY_KEEP = 50  # newest recordings kept; older replay_*.bin files are deleted on save
+
+# Particle effects: hard cap on live particles (the oldest are evicted first) and
+# what one enemy burst throws; debris appears from level 2 and grows per level
+PARTICLE_CAPACITY = 8192
+PARTICLE_SPARKS = 16
+PARTICLE_DEBRIS_PER_LEVEL = 4
+PARTICLE_MAX_DEBRIS = 48
+
+# Rewind (hold Backspace): one snapshot per simulation step for the last N seconds
+REWIND_ENABLED = True
+REWIND_SECONDS = 10
+REWIND_KEYFRAME_INTERVAL = 30  # full snapshot every N steps, XOR deltas between
+REWIND_STEPS_PER_FRAME = 2  # rewind playback speed
+
+# `main.py --profile-startup` exits non-zero when the first frame takes longer
+STARTUP_BUDGET_MS = 200
+
+# Rendered text surfaces kept by ui.text_cache (LRU)
+TEXT_CACHE_SIZE = 128
 
 # Window
 WINDOW_TITLE = "Space Invaders - Pygame"
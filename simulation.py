@@ -0,0 +1,203 @@
+from __future__ import annotations
+import random
+import pygame
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from settings import SIM_HZ, DIFFICULTY_PRESETS, ENEMY_ROWS, ENEMY_COLS, HORDE_PLAYER_COOLDOWN_MS
+from assets_loader import Assets, build_masks
+from entities import Player, BulletPool, EnemyFormation, masks_overlap
+from spatial import SpatialHash
+from horde import Horde
+
+
+# Events emitted by Simulation.step for the presentation layer (sounds, explosions)
+EVENT_SHOOT = "shoot"
+EVENT_HIT = "hit"
+EVENT_PLAYER_HIT = "player_hit"
+EVENT_GAME_OVER = "game_over"
+EVENT_LEVEL_UP = "level_up"
+
+
+@dataclass
+class InputState:
+    left: bool = False
+    right: bool = False
+    fire: bool = False
+
+    @classmethod
+    def from_keys(cls, keys: pygame.key.ScancodeWrapper) -> "InputState":
+        return cls(
+            left=bool(keys[pygame.K_LEFT] or keys[pygame.K_a]),
+            right=bool(keys[pygame.K_RIGHT] or keys[pygame.K_d]),
+            fire=bool(keys[pygame.K_SPACE]),
+        )
+
+    # Bit layout shared with replays and vecenv actions: 1 left, 2 right, 4 fire
+    def to_mask(self) -> int:
+        return int(self.left) | int(self.right) << 1 | int(self.fire) << 2
+
+    @classmethod
+    def from_mask(cls, mask: int) -> "InputState":
+        return cls(left=bool(mask & 1), right=bool(mask & 2), fire=bool(mask & 4))
+
+
+class Simulation:
+    # Display-free game core. Time advances only through step(); one step is 1/SIM_HZ
+    # seconds, so now_ms is derived from the tick counter instead of the wall clock.
+
+    def __init__(self, images: Dict[str, pygame.Surface], difficulty: str = "Normal", seed: Optional[int] = None,
+                 rows: int = ENEMY_ROWS, cols: int = ENEMY_COLS,
+                 masks: Optional[Dict[str, pygame.mask.Mask]] = None, horde: bool = False) -> None:
+        self.images = images
+        # Collision masks per image (Assets.masks); built here when not supplied
+        self.masks = masks if masks is not None else build_masks(images)
+        self.difficulty = difficulty
+        self.seed = seed
+        # Formation size, kept across levels
+        self.rows = rows
+        self.cols = cols
+        # Endless waves (horde.py) instead of one formation per level
+        self.horde = horde
+        # All gameplay randomness comes from this generator; reset(seed=...) reseeds it
+        self.rng = random.Random(seed)
+        self.level = 1
+        self.grid = SpatialHash()
+        self.reset()
+
+    @classmethod
+    def headless(cls, difficulty: str = "Normal", seed: Optional[int] = None, horde: bool = False) -> "Simulation":
+        # Images are only needed for their sizes; no display, fonts or mixer required
+        assets = Assets()
+        assets.load_images()
+        return cls(assets.images, difficulty, seed, masks=assets.masks, horde=horde)
+
+    @property
+    def now_ms(self) -> int:
+        return self.tick * 1000 // SIM_HZ
+
+    def reset(self, level: int = 1, seed: Optional[int] = None) -> None:
+        if seed is not None:
+            self.seed = seed
+            self.rng.seed(seed)
+        self.level = level
+        self.tick = 0
+        self.player = Player(self.images["player"], None)
+        if self.horde:
+            self.player.cooldown_ms = HORDE_PLAYER_COOLDOWN_MS
+        # Allow shooting on the very first tick (sim time starts at 0)
+        self.player.last_shot_time = -self.player.cooldown_ms
+        self.player_bullet_image = self.images["bullet"]
+        self.enemy_bullet_image = self.images["enemy_bullet"]
+        self._spawn_formation()
+        self.bullets = self._new_bullets()
+        self.score = 0
+        self.game_over = False
+        self.events: List[Tuple[str, Optional[Tuple[int, int]]]] = []
+
+    def _spawn_formation(self) -> None:
+        if self.horde:
+            self.enemies = Horde(self._new_formation, self.images["horde_enemy"], self.masks.get("horde_enemy"))
+        else:
+            self.enemies = self._new_formation(self.images["enemy"], self.rows, self.cols, mask=self.masks.get("enemy"))
+        self.apply_difficulty()
+
+    def _new_bullets(self) -> BulletPool:
+        # Bullet store factory; the array backend overrides it
+        return BulletPool()
+
+    def _new_formation(self, image: pygame.Surface, rows: int, cols: int, **kwargs) -> EnemyFormation:
+        # Formation factory (also used for horde waves); the array backend overrides it
+        return EnemyFormation(image, self.enemy_bullet_image, None, rng=self.rng, rows=rows, cols=cols, **kwargs)
+
+    def apply_difficulty(self) -> None:
+        preset = DIFFICULTY_PRESETS.get(self.difficulty, DIFFICULTY_PRESETS["Normal"])
+        self.enemies.move_interval_ms = preset["enemy_move_interval_ms"]
+        self.enemies.shoot_chance = preset["enemy_shoot_chance"]
+        # scale by level (increase challenge as level rises)
+        if self.level > 1:
+            self.enemies.move_interval_ms = max(100, int(self.enemies.move_interval_ms * (0.94 ** (self.level - 1))))
+            self.enemies.shoot_chance *= (1.06 ** (self.level - 1))
+
+    def step(self, inputs: InputState) -> None:
+        self.events = []
+        if self.game_over:
+            return
+        self.tick += 1
+        now_ms = self.now_ms
+
+        # Player
+        self.player.move(int(inputs.right) - int(inputs.left))
+        if inputs.fire:
+            shots = len(self.bullets)
+            self.player.try_shoot(self.bullets, now_ms, self.player_bullet_image)
+            if len(self.bullets) > shots:
+                self.events.append((EVENT_SHOOT, self.player.rect.midtop))
+
+        # Enemies
+        self._update_enemies(now_ms)
+
+        # Bullets and collisions
+        self._update_bullets()
+        self._check_collisions()
+
+        if self.enemies.any_reached_bottom():
+            self._end_game()
+
+        if self.enemies.all_dead():
+            # Next level: increase difficulty a bit each level
+            self.level += 1
+            self._spawn_formation()
+            self.events.append((EVENT_LEVEL_UP, None))
+
+    def _update_enemies(self, now_ms: int) -> None:
+        self.enemies.update(now_ms, self.bullets)
+
+    def _update_bullets(self) -> None:
+        self.bullets.update()
+
+    def _check_collisions(self) -> None:
+        # Two stages: rects (spatial hash, then colliderect) find candidate pairs and
+        # only those are tested pixel by pixel against the masks.
+        # Broad phase shared by both checks below, holding only the bullets that can
+        # hit anything: player shots inside the formation's box, enemy shots over
+        # the player. Indices are the pool's, so queries keep its order.
+        grid = self.grid
+        grid.clear()
+        box = self.enemies.bounds()
+        player_rect = self.player.rect
+        insert = grid.insert
+        for i, b in enumerate(self.bullets):
+            if not b.alive:
+                continue
+            rect = b.rect
+            if b.from_player:
+                if box is not None and rect.colliderect(box):
+                    insert(i, rect)
+            elif rect.colliderect(player_rect):
+                insert(i, rect)
+        masks = self.masks
+
+        # Collisions: player bullets vs enemies
+        gained = self.enemies.check_collision_with_bullets(self.bullets, self.grid, masks.get("bullet"))
+        if gained:
+            self.score += gained
+            for b in self.bullets:
+                if not b.alive and b.from_player:
+                    self.events.append((EVENT_HIT, b.rect.center))
+
+        # Collisions: enemy bullets vs player
+        for i in self.grid.query(self.player.rect):
+            b = self.bullets[i]
+            if (b.alive and not b.from_player and self.player.rect.colliderect(b.rect)
+                    and masks_overlap(masks.get("player"), self.player.rect, masks.get("enemy_bullet"), b.rect)):
+                b.alive = False
+                self.events.append((EVENT_PLAYER_HIT, self.player.rect.center))
+                self._end_game()
+                break
+
+    def _end_game(self) -> None:
+        if self.game_over:
+            return
+        self.player.alive = False
+        self.game_over = True
+        self.events.append((EVENT_GAME_OVER, None))
@@ -0,0 +1,189 @@
+import struct
+import zlib
+from array import array
+from collections import deque
+from typing import Deque, Optional, Tuple
+from settings import SIM_HZ, REWIND_SECONDS, REWIND_KEYFRAME_INTERVAL
+from effects import ParticleSystem
+from entities import BulletPool, BULLET_KEY
+
+# Binary game-state snapshots (save_state/load_state) and a delta-compressed
+# rewind ring buffer. A snapshot holds everything Simulation.step reads, including
+# the RNG state, so stepping on from a restored snapshot continues exactly like the
+# original run. Particle effects (Game-side) ride along as their live bursts, from
+# which ParticleSystem.restore regenerates every particle.
+#
+#   header | rng words (625 x u32) | enemies: alive[] (u8) |
+#   bullets: key[] (entities.BULLET_KEY rows), y[] (i16), alive[] (u8) |
+#   bursts: kind[] (u8), x[], y[] (i16), tick[] (u32), level[] (u16)
+#
+# Columns rather than records: a column that did not change XORs to zeros, which
+# is what makes the rewind deltas small. A bullet's key holds the fields fixed at
+# spawn, packed once by the pool, so only y and alive are read per snapshot.
+# Enemies sit at fixed slots around the formation origin (in the header), so they
+# need only their alive flags.
+
+VERSION = 4
+_HEADER = struct.Struct("<BIIHBBhhiBbiidii3I")
+
+
+# BULLET_KEY as a numpy record, for the array backend
+_KEY_DTYPE = [("x", "<i2"), ("vy", "i1"), ("w", "u1"), ("h", "u1"), ("from_player", "u1")]
+
+
+def _column(typecode: str, values) -> bytes:
+    return array(typecode, values).tobytes()
+
+
+def save_state(sim, particles: Optional[ParticleSystem] = None) -> bytes:
+    player = sim.player
+    formation = sim.enemies
+    rng_version, rng_words, _ = sim.rng.getstate()
+    alive = formation.index.alive
+    parts = [bytes(alive)]
+    bullets = sim.bullets
+    if isinstance(bullets, BulletPool):
+        n_bullets = len(bullets)
+        parts.extend(bullets.columns())
+    else:
+        # Array backend: columns are numpy arrays already
+        import numpy as np
+        n = n_bullets = bullets.n
+        keys = np.empty(n, dtype=_KEY_DTYPE)
+        keys["x"], keys["vy"], keys["w"], keys["h"] = bullets.x[:n], bullets.vy[:n], bullets.w[:n], bullets.h[:n]
+        keys["from_player"] = bullets.from_player[:n]
+        parts.append(keys.tobytes())
+        parts.append(bullets.y[:n].astype("<i2").tobytes())
+        parts.append(bullets.alive[:n].astype("u1").tobytes())
+    fx = particles.bursts if particles is not None else []
+    parts.append(bytes([b[0] for b in fx]))
+    parts.append(_column("h", [b[1] for b in fx]))
+    parts.append(_column("h", [b[2] for b in fx]))
+    parts.append(_column("I", [b[3] for b in fx]))
+    parts.append(_column("H", [b[4] for b in fx]))
+    header = _HEADER.pack(
+        VERSION, sim.tick, sim.score, sim.level, sim.game_over, player.alive,
+        player.rect.x, player.rect.y, player.last_shot_time,
+        rng_version, formation.direction, formation.last_move_time, formation.move_interval_ms, formation.shoot_chance,
+        formation.origin_x, formation.origin_y, len(alive), n_bullets, len(fx),
+    )
+    return header + _column("I", rng_words) + b"".join(parts)
+
+
+def load_state(sim, data: bytes, particles: Optional[ParticleSystem] = None) -> None:
+    # Restores sim (and particles, when given) in place
+    (version, tick, score, level, game_over, player_alive, px, py, last_shot,
+     rng_version, direction, last_move, move_interval, shoot_chance,
+     origin_x, origin_y, n_enemies, n_bullets, n_fx) = _HEADER.unpack_from(data)
+    if version != VERSION:
+        raise ValueError(f"unsupported snapshot version {version}")
+    pos = _HEADER.size
+    rng_words = array("I", data[pos:pos + 625 * 4])
+    pos += 625 * 4
+
+    def take(typecode: str, count: int) -> array:
+        nonlocal pos
+        col = array(typecode)
+        size = col.itemsize * count
+        col.frombytes(data[pos:pos + size])
+        pos += size
+        return col
+
+    ealive = take("B", n_enemies)
+    bkeys = data[pos:pos + n_bullets * BULLET_KEY.size]
+    pos += len(bkeys)
+    by = take("h", n_bullets)
+    balive = data[pos:pos + n_bullets]
+    pos += n_bullets
+    fx_kind, fx_x, fx_y = take("B", n_fx), take("h", n_fx), take("h", n_fx)
+    fx_tick, fx_level = take("I", n_fx), take("H", n_fx)
+
+    sim.tick, sim.score, sim.level, sim.game_over = tick, score, level, bool(game_over)
+    sim.events = []
+    sim.player.rect.topleft = (px, py)
+    sim.player.last_shot_time = last_shot
+    sim.player.alive = bool(player_alive)
+    sim.rng.setstate((rng_version, tuple(rng_words), None))
+    formation = sim.enemies
+    formation.direction, formation.last_move_time = direction, last_move
+    formation.move_interval_ms, formation.shoot_chance = move_interval, shoot_chance
+    formation.restore(origin_x, origin_y, ealive.tolist())
+
+    bullets = sim.bullets
+    if isinstance(bullets, BulletPool):
+        bullets.restore_columns(bkeys, by, balive)
+    else:
+        import numpy as np
+        bullets.n = 0
+        bullets._reserve(n_bullets)
+        n = bullets.n = n_bullets
+        keys = np.frombuffer(bkeys, dtype=_KEY_DTYPE)
+        bullets.x[:n], bullets.vy[:n], bullets.w[:n], bullets.h[:n] = keys["x"], keys["vy"], keys["w"], keys["h"]
+        bullets.from_player[:n] = keys["from_player"] > 0
+        bullets.y[:n] = by
+        bullets.alive[:n] = np.frombuffer(balive, dtype="u1") > 0
+
+    if particles is not None:
+        particles.restore(list(zip(fx_kind, fx_x, fx_y, fx_tick, fx_level)), tick)
+
+
+def _xor(a: bytes, b: bytes) -> bytes:
+    size = max(len(a), len(b))
+    return (int.from_bytes(a, "little") ^ int.from_bytes(b, "little")).to_bytes(size, "little")
+
+
+class RewindBuffer:
+    # Last `seconds` of snapshots, one per simulation step. Every
+    # REWIND_KEYFRAME_INTERVAL-th entry is kept whole; the others are stored as a
+    # zlib-compressed XOR against that keyframe, so any entry decodes with a single
+    # XOR no matter how far back it is. Entries hold a reference to their keyframe,
+    # so evicting the keyframe's own slot does not break the deltas that use it.
+
+    def __init__(self, seconds: float = REWIND_SECONDS, keyframe_interval: int = REWIND_KEYFRAME_INTERVAL) -> None:
+        self.capacity = max(1, int(seconds * SIM_HZ))
+        self.keyframe_interval = keyframe_interval
+        # (keyframe, compressed delta or None, length)
+        self._entries: Deque[Tuple[bytes, Optional[bytes], int]] = deque(maxlen=self.capacity)
+        self._key: Optional[bytes] = None
+        self._since_key = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._key = None
+        self._since_key = 0
+
+    def push(self, state: bytes) -> None:
+        if self._key is None or self._since_key >= self.keyframe_interval:
+            self._key = state
+            self._since_key = 0
+            self._entries.append((state, None, len(state)))
+        else:
+            self._entries.append((self._key, zlib.compress(_xor(state, self._key), 1), len(state)))
+        self._since_key += 1
+
+    def get(self, back: int = 0) -> bytes:
+        # back=0 is the newest snapshot
+        key, delta, length = self._entries[-1 - back]
+        if delta is None:
+            return key
+        return _xor(zlib.decompress(delta), key)[:length]
+
+    def rewind(self, steps: int = 1) -> Optional[bytes]:
+        # Drop the newest `steps` snapshots and return the one now on top
+        # (it stays in the buffer, so rewinding again continues from there)
+        steps = min(steps, len(self._entries) - 1)
+        if steps <= 0:
+            return self.get() if self._entries else None
+        for _ in range(steps):
+            self._entries.pop()
+        # New pushes must not delta against a keyframe that is no longer on top
+        self._key = None
+        return self.get()
+
+    def stats(self) -> dict:
+        stored = sum(len(d) if d is not None else n for _, d, n in self._entries)
+        raw = sum(n for _, _, n in self._entries)
+        return {"entries": len(self._entries), "stored_bytes": stored, "raw_bytes": raw}
@@ -0,0 +1,313 @@
+from __future__ import annotations
+import random
+import pygame
+from typing import Iterator, List, Optional, Sequence, Tuple
+from settings import (
+    SCREEN_WIDTH,
+    SCREEN_HEIGHT,
+    ENEMY_BULLET_SPEED,
+    ENEMY_COLS,
+    ENEMY_ROWS,
+    ENEMY_HMOVE_PIXELS,
+    ENEMY_VMOVE_PIXELS,
+    ENEMY_MOVE_INTERVAL_MS,
+    ENEMY_SHOOT_CHANCE,
+)
+from entities import Bullet, Enemy, FormationIndex, FormationLayout, DEFAULT_LAYOUT, masks_overlap
+from simulation import Simulation, EVENT_HIT, EVENT_PLAYER_HIT
+
+# Struct-of-arrays backend: same rules as entities.py, with positions and flags kept
+# in contiguous NumPy arrays so per-tick work runs vectorized. NumPy is optional;
+# the object backend in entities.py needs only pygame.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+HAS_NUMPY = np is not None
+
+# Upper bound on the enemy x bullet overlap matrix built per collision chunk
+COLLISION_CHUNK_CELLS = 1 << 20
+
+_BULLET_FIELDS = (("x", "i4"), ("y", "i4"), ("w", "i4"), ("h", "i4"), ("vy", "i4"), ("from_player", "?"), ("alive", "?"))
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise RuntimeError("The array backend requires numpy (pip install numpy)")
+
+
+class BulletArrays:
+    # Live bullets are packed into [0, n); order matches the list in the object
+    # backend, so "first bullet hit" resolves identically.
+
+    def __init__(self, capacity: int = 256) -> None:
+        _require_numpy()
+        self.n = 0
+        self.capacity = 0
+        self._grow(max(1, capacity))
+
+    def _grow(self, capacity: int) -> None:
+        for name, dtype in _BULLET_FIELDS:
+            arr = np.zeros(capacity, dtype=dtype)
+            old = getattr(self, name, None)
+            if old is not None:
+                arr[:self.n] = old[:self.n]
+            setattr(self, name, arr)
+        self.capacity = capacity
+
+    def _reserve(self, count: int) -> None:
+        if self.n + count > self.capacity:
+            self._grow(max(self.capacity * 2, self.n + count))
+
+    def spawn(self, x: int, y: int, w: int, h: int, vy: int, from_player: bool) -> int:
+        # Same signature as BulletPool.spawn; returns the new bullet's index
+        self._reserve(1)
+        i = self.n
+        self.x[i], self.y[i], self.w[i], self.h[i], self.vy[i] = x, y, w, h, vy
+        self.from_player[i] = from_player
+        self.alive[i] = True
+        self.n += 1
+        return i
+
+    def spawn_many(self, xs, ys, w: int, h: int, vy: int, from_player: bool) -> None:
+        count = len(xs)
+        if not count:
+            return
+        self._reserve(count)
+        s = slice(self.n, self.n + count)
+        self.x[s] = xs
+        self.y[s] = ys
+        self.w[s] = w
+        self.h[s] = h
+        self.vy[s] = vy
+        self.from_player[s] = from_player
+        self.alive[s] = True
+        self.n += count
+
+    def append(self, bullet: Bullet) -> None:
+        # Object-API entry point for code that builds Bullet instances
+        r = bullet.rect
+        self.spawn(r.x, r.y, r.w, r.h, bullet.vy, bullet.from_player)
+
+    def update(self) -> None:
+        # Move, then drop dead and off-screen bullets (stable compaction)
+        n = self.n
+        y = self.y[:n]
+        y += self.vy[:n]
+        keep = self.alive[:n] & (y + self.h[:n] >= 0) & (y <= SCREEN_HEIGHT)
+        count = int(np.count_nonzero(keep))
+        if count == n:
+            return
+        for name, _ in _BULLET_FIELDS:
+            arr = getattr(self, name)
+            arr[:count] = arr[:n][keep]
+        self.n = count
+
+    def overlapping(self, rect: pygame.Rect, from_player: bool) -> "np.ndarray":
+        # Indices of alive bullets of one side overlapping rect (colliderect semantics)
+        n = self.n
+        x, y = self.x[:n], self.y[:n]
+        mask = (
+            self.alive[:n]
+            & (self.from_player[:n] == from_player)
+            & (x < rect.right) & (x + self.w[:n] > rect.left)
+            & (y < rect.bottom) & (y + self.h[:n] > rect.top)
+        )
+        return np.flatnonzero(mask)
+
+    def pos(self, i: int):
+        return (int(self.x[i]), int(self.y[i]))
+
+    def center(self, i: int):
+        return (int(self.x[i] + self.w[i] // 2), int(self.y[i] + self.h[i] // 2))
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __iter__(self) -> Iterator[Bullet]:
+        # Read-only views for rendering
+        for i in range(self.n):
+            rect = pygame.Rect(int(self.x[i]), int(self.y[i]), int(self.w[i]), int(self.h[i]))
+            yield Bullet(rect, int(self.vy[i]), bool(self.from_player[i]), bool(self.alive[i]))
+
+
+class ArrayFormation:
+    # Drop-in for EnemyFormation backed by BulletArrays-style arrays. x/y hold each
+    # slot's fixed local position; world = local + origin, as in EnemyFormation.
+
+    def __init__(self, enemy_image: pygame.Surface, enemy_bullet_image: pygame.Surface, hit_sound, shoot_chance: float = ENEMY_SHOOT_CHANCE,
+                 rows: int = ENEMY_ROWS, cols: int = ENEMY_COLS, rng: Optional[random.Random] = None,
+                 mask: Optional[pygame.mask.Mask] = None, layout: FormationLayout = DEFAULT_LAYOUT,
+                 alive: Optional[Sequence[bool]] = None, hmove: int = ENEMY_HMOVE_PIXELS,
+                 vmove: int = ENEMY_VMOVE_PIXELS) -> None:
+        _require_numpy()
+        self.enemy_image = enemy_image
+        self.mask = mask
+        self.enemy_bullet_image = enemy_bullet_image
+        self.hit_sound = hit_sound
+        self.shoot_chance = shoot_chance
+        self.rng = rng if rng is not None else random
+        self.rows = rows
+        self.cols = cols
+        self.layout = layout
+        self.hmove = hmove
+        self.vmove = vmove
+        self.origin_x = 0
+        self.origin_y = 0
+        self.direction = 1  # 1 right, -1 left
+        self.last_move_time = 0
+        self.move_interval_ms = ENEMY_MOVE_INTERVAL_MS
+        self.w, self.h = enemy_image.get_size()
+        self.bw, self.bh = enemy_bullet_image.get_size()
+        self._spawn_grid(rows, cols, alive)
+
+    def _spawn_grid(self, rows: int, cols: int, alive: Optional[Sequence[bool]] = None) -> None:
+        x0, y0, dx, dy = self.layout
+        row_idx, col_idx = np.divmod(np.arange(rows * cols), cols)
+        self.x = (x0 + col_idx * dx).astype("i4")
+        self.y = (y0 + row_idx * dy).astype("i4")
+        self.index = FormationIndex(rows, cols, alive)
+        self.alive = np.array(self.index.alive, dtype=bool)
+
+    def restore(self, origin_x: int, origin_y: int, alive) -> None:
+        if len(alive) != len(self.alive):
+            raise ValueError(f"snapshot has {len(alive)} enemies, formation has {len(self.alive)}")
+        self.origin_x, self.origin_y = origin_x, origin_y
+        self.alive = np.array(alive, dtype=bool)
+        self.index.rebuild(alive)
+
+    @property
+    def alive_count(self) -> int:
+        return self.index.alive_count
+
+    @property
+    def enemies(self) -> List[Enemy]:
+        # Read-only views; rendering uses draw_items()
+        views = []
+        ox, oy = self.origin_x, self.origin_y
+        for x, y, alive in zip(self.x.tolist(), self.y.tolist(), self.alive.tolist()):
+            e = Enemy(self.enemy_image, x + ox, y + oy)
+            e.alive = alive
+            views.append(e)
+        return views
+
+    def draw_items(self) -> List[Tuple[pygame.Surface, Tuple[int, int]]]:
+        live = np.flatnonzero(self.alive)
+        xs = (self.x[live] + self.origin_x).tolist()
+        ys = (self.y[live] + self.origin_y).tolist()
+        image = self.enemy_image
+        return [(image, pos) for pos in zip(xs, ys)]
+
+    def bounds(self) -> Optional[pygame.Rect]:
+        index = self.index
+        if not index.alive_count:
+            return None
+        top, bottom = int(self.y[index.highest]), int(self.y[index.lowest])
+        left, right = int(self.x[index.left]), int(self.x[index.right])
+        return pygame.Rect(self.origin_x + left, self.origin_y + top, right - left + self.w, bottom - top + self.h)
+
+    def update(self, now_ms: int, bullets: BulletArrays) -> None:
+        index = self.index
+        if now_ms - self.last_move_time >= self.move_interval_ms:
+            self.last_move_time = now_ms
+            if not index.alive_count:
+                return
+            min_x = self.origin_x + int(self.x[index.left])
+            max_x = self.origin_x + int(self.x[index.right]) + self.w
+            if (self.direction > 0 and max_x + self.hmove >= SCREEN_WIDTH - 10) or (
+                self.direction < 0 and min_x - self.hmove <= 10
+            ):
+                self.origin_y += self.vmove
+                self.direction *= -1
+            else:
+                self.origin_x += self.hmove * self.direction
+        # Bottom-most enemy per column, in the same order as the object backend
+        # so the random stream is consumed identically
+        chosen = [i for i in index.shooters() if self.rng.random() < self.shoot_chance]
+        if chosen:
+            idx = np.asarray(chosen)
+            xs = self.origin_x + self.x[idx] + self.w // 2 - self.bw // 2
+            ys = self.origin_y + self.y[idx] + self.h
+            bullets.spawn_many(xs, ys, self.bw, self.bh, ENEMY_BULLET_SPEED, False)
+
+    def check_collision_with_bullets(self, bullets: BulletArrays, grid=None, bullet_mask: Optional[pygame.mask.Mask] = None) -> int:
+        live = np.flatnonzero(self.alive)
+        n = bullets.n
+        if live.size == 0 or n == 0:
+            return 0
+        cand = np.flatnonzero(bullets.alive[:n] & bullets.from_player[:n])
+        if cand.size == 0:
+            return 0
+        # Work in formation space: bullets are shifted by the origin instead of
+        # every enemy by it. Vertical band prefilter against the formation's extent.
+        ox, oy = self.origin_x, self.origin_y
+        by, bh = bullets.y[cand] - oy, bullets.h[cand]
+        band = (by < int(self.y[self.index.lowest]) + self.h) & (by + bh > int(self.y[self.index.highest]))
+        cand = cand[band]
+        if cand.size == 0:
+            return 0
+        bx, by = bullets.x[cand] - ox, bullets.y[cand] - oy
+        bright, bbottom = bx + bullets.w[cand], by + bullets.h[cand]
+
+        score = 0
+        chunk = max(1, COLLISION_CHUNK_CELLS // cand.size)
+        for start in range(0, live.size, chunk):
+            rows = live[start:start + chunk]
+            ex, ey = self.x[rows][:, None], self.y[rows][:, None]
+            hits = (ex < bright) & (ex + self.w > bx) & (ey < bbottom) & (ey + self.h > by)
+            # Resolve in enemy order; each bullet kills at most one enemy. Only these
+            # few rect hits reach the per-pixel test.
+            for r in np.flatnonzero(hits.any(axis=1)).tolist():
+                hit = cand[hits[r]]
+                hit = hit[bullets.alive[hit]].tolist()
+                erect = (int(self.x[rows[r]]) + ox, int(self.y[rows[r]]) + oy)
+                first = next((i for i in hit if masks_overlap(self.mask, erect, bullet_mask, bullets.pos(i))), None)
+                if first is not None:
+                    bullets.alive[first] = False
+                    self.alive[rows[r]] = False
+                    self.index.kill(int(rows[r]))
+                    score += 100
+                    if self.hit_sound:
+                        self.hit_sound.play()
+        return score
+
+    def any_reached_bottom(self) -> bool:
+        lowest = self.index.lowest
+        return lowest >= 0 and self.origin_y + int(self.y[lowest]) + self.h >= SCREEN_HEIGHT - 60
+
+    def all_dead(self) -> bool:
+        return self.index.alive_count == 0
+
+
+class ArraySimulation(Simulation):
+    # Simulation on the array backend; sim.bullets and sim.enemies.enemies still
+    # iterate as Bullet / Enemy objects for rendering.
+
+    def __init__(self, images, difficulty: str = "Normal", seed: Optional[int] = None,
+                 rows: int = ENEMY_ROWS, cols: int = ENEMY_COLS, masks=None, horde: bool = False) -> None:
+        _require_numpy()
+        super().__init__(images, difficulty, seed, rows, cols, masks, horde)
+
+    def _new_bullets(self) -> BulletArrays:
+        return BulletArrays()
+
+    def _new_formation(self, image: pygame.Surface, rows: int, cols: int, **kwargs) -> ArrayFormation:
+        return ArrayFormation(image, self.enemy_bullet_image, None, rows=rows, cols=cols, rng=self.rng, **kwargs)
+
+    def _check_collisions(self) -> None:
+        bullets = self.bullets
+        gained = self.enemies.check_collision_with_bullets(bullets, bullet_mask=self.masks.get("bullet"))
+        if gained:
+            self.score += gained
+            n = bullets.n
+            for i in np.flatnonzero(~bullets.alive[:n] & bullets.from_player[:n]).tolist():
+                self.events.append((EVENT_HIT, bullets.center(i)))
+
+        hits = bullets.overlapping(self.player.rect, from_player=False).tolist()
+        player_mask, bullet_mask = self.masks.get("player"), self.masks.get("enemy_bullet")
+        hit = next((i for i in hits if masks_overlap(player_mask, self.player.rect, bullet_mask, bullets.pos(i))), None)
+        if hit is not None:
+            bullets.alive[hit] = False
+            self.events.append((EVENT_PLAYER_HIT, self.player.rect.center))
+            self._end_game()
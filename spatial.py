@@ -0,0 +1,48 @@
+from __future__ import annotations
+import pygame
+from typing import Dict, Iterable, List, Tuple
+from settings import SPATIAL_CELL_SIZE
+
+
+class SpatialHash:
+    # Uniform grid broad phase. Items are stored by their index into the caller's
+    # list so query results can be walked in the same order as the list itself.
+
+    def __init__(self, cell_size: int = SPATIAL_CELL_SIZE) -> None:
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+
+    def clear(self) -> None:
+        self.cells.clear()
+
+    def insert(self, index: int, rect: pygame.Rect) -> None:
+        cs = self.cell_size
+        cells = self.cells
+        for cy in range(rect.top // cs, (rect.bottom - 1) // cs + 1):
+            for cx in range(rect.left // cs, (rect.right - 1) // cs + 1):
+                bucket = cells.get((cx, cy))
+                if bucket is None:
+                    cells[(cx, cy)] = [index]
+                else:
+                    bucket.append(index)
+
+    def build(self, rects: Iterable[pygame.Rect]) -> None:
+        self.cells.clear()
+        for i, rect in enumerate(rects):
+            self.insert(i, rect)
+
+    def query(self, rect: pygame.Rect) -> List[int]:
+        # Indices of items sharing at least one cell with rect, ascending
+        cs = self.cell_size
+        cells = self.cells
+        x0, x1 = rect.left // cs, (rect.right - 1) // cs
+        y0, y1 = rect.top // cs, (rect.bottom - 1) // cs
+        if x0 == x1 and y0 == y1:
+            return list(cells.get((x0, y0), ()))
+        found = set()
+        for cy in range(y0, y1 + 1):
+            for cx in range(x0, x1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    found.update(bucket)
+        return sorted(found)
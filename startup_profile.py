@@ -0,0 +1,163 @@
+import functools
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+# Startup profiler behind `python main.py --profile-startup`. Nothing here may import
+# pygame at module level: the imports themselves are part of what is measured.
+
+# Our modules in dependency order, so each import is charged only its own body
+GAME_MODULES = [
+    "settings",
+    "spatial",
+    "asset_bundle",
+    "assets_loader",
+    "entities",
+    "horde",
+    "effects",
+    "simulation",
+    "soa",
+    "governor",
+    "frame_stats",
+    "ui",
+    "render",
+    "replay",
+    "snapshot",
+    "pipeline",
+    "game",
+]
+
+
+class StartupProfiler:
+    # Records named sections; nesting is tracked per thread so every entry has
+    # an inclusive time (ms) and a time excluding nested sections (self_ms)
+
+    def __init__(self, start_time: float) -> None:
+        self.start_time = start_time
+        self.entries: List[Dict] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._patches = []
+
+    @contextmanager
+    def section(self, name: str):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        children = [0.0]
+        stack.append(children)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            ms = (time.perf_counter() - start) * 1000.0
+            stack.pop()
+            if stack:
+                stack[-1][0] += ms
+            entry = {
+                "name": name,
+                "ms": ms,
+                "self_ms": ms - children[0],
+                "start_ms": (start - self.start_time) * 1000.0,
+                "thread": threading.current_thread().name,
+            }
+            with self._lock:
+                self.entries.append(entry)
+
+    def patch(self, owner, attr: str, label: Callable[..., str]) -> None:
+        # Time every call of owner.attr under label(*args); undone by restore()
+        original = getattr(owner, attr)
+
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            with self.section(label(*args, **kwargs)):
+                return original(*args, **kwargs)
+
+        setattr(owner, attr, timed)
+        self._patches.append((owner, attr, original))
+
+    def restore(self) -> None:
+        for owner, attr, original in reversed(self._patches):
+            setattr(owner, attr, original)
+        self._patches = []
+
+    def report(self, first_frame_ms: float, budget_ms: float) -> str:
+        lines = [f"{'ms':>9} {'self':>9} {'at':>9}  {'thread':<12} section"]
+        for e in sorted(self.entries, key=lambda e: e["ms"], reverse=True):
+            lines.append(f"{e['ms']:9.2f} {e['self_ms']:9.2f} {e['start_ms']:9.1f}  {e['thread']:<12} {e['name']}")
+        verdict = "OK" if first_frame_ms <= budget_ms else "OVER BUDGET"
+        lines.append(f"time to first frame: {first_frame_ms:.1f} ms (budget {budget_ms:.0f} ms) {verdict}")
+        return "\n".join(lines)
+
+    def to_dict(self, first_frame_ms: float, budget_ms: float) -> Dict:
+        return {
+            "first_frame_ms": first_frame_ms,
+            "budget_ms": budget_ms,
+            "within_budget": first_frame_ms <= budget_ms,
+            "entries": sorted(self.entries, key=lambda e: e["start_ms"]),
+        }
+
+
+def _unlisted_modules() -> List[str]:
+    # Our modules that got imported without being listed in GAME_MODULES
+    here = os.path.dirname(os.path.abspath(__file__))
+    skip = set(GAME_MODULES) | {"__main__", "main", "startup_profile"}
+    return sorted(
+        name for name, module in list(sys.modules.items())
+        if name not in skip and getattr(module, "__file__", None)
+        and os.path.dirname(os.path.abspath(module.__file__)) == here
+    )
+
+
+def profile_startup(start_time: float, budget_ms: Optional[float] = None, json_path: Optional[str] = None) -> int:
+    # Builds the game up to its first drawn frame, then waits for the background
+    # load so its work is listed too. Returns the process exit code.
+    prof = StartupProfiler(start_time)
+    with prof.section("import pygame"):
+        import pygame
+    for name in GAME_MODULES:
+        with prof.section(f"import {name}"):
+            importlib.import_module(name)
+    unlisted = _unlisted_modules()
+
+    import assets_loader
+    from asset_bundle import AssetBundle
+    from game import Game
+    from settings import STARTUP_BUDGET_MS
+    if budget_ms is None:
+        budget_ms = STARTUP_BUDGET_MS
+
+    prof.patch(pygame.display, "init", lambda: "pygame.display.init")
+    prof.patch(pygame.font, "init", lambda: "pygame.font.init")
+    prof.patch(pygame.mixer, "init", lambda *a, **k: "pygame.mixer.init")
+    prof.patch(pygame.display, "set_mode", lambda *a, **k: "pygame.display.set_mode")
+    prof.patch(pygame.font, "SysFont", lambda name, size, *a, **k: f"SysFont {name} {size}")
+    prof.patch(assets_loader, "open_bundle", lambda *a, **k: "open_bundle")
+    prof.patch(AssetBundle, "images", lambda self: "AssetBundle.images")
+    prof.patch(AssetBundle, "sound", lambda self, name: f"AssetBundle.sound {name}")
+    prof.patch(assets_loader.Assets, "_load_image", lambda self, filename: f"Assets._load_image {filename}")
+    prof.patch(assets_loader.Assets, "_load_sound", lambda self, filename: f"Assets._load_sound {filename}")
+    prof.patch(Game, "_build_ui", lambda self: "Game._build_ui")
+    try:
+        with prof.section("Game()"):
+            game = Game(start_time=start_time)
+        with prof.section("first draw()"):
+            game.draw()
+        first_frame_ms = (time.perf_counter() - start_time) * 1000.0
+        game._finish_loading(wait=True)
+    finally:
+        prof.restore()
+    pygame.quit()
+
+    print(prof.report(first_frame_ms, budget_ms))
+    if unlisted:
+        print("Not in GAME_MODULES, timed as part of their importer: " + ", ".join(unlisted))
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(prof.to_dict(first_frame_ms, budget_ms), f, indent=2)
+    return 0 if first_frame_ms <= budget_ms else 1
@@ -1,5 +1,51 @@
 import pygame
-from typing import Callable, Tuple
+from collections import OrderedDict
+from typing import Callable, Dict, Tuple
+from settings import TEXT_CACHE_SIZE
+
+
+class TextCache:
+    # LRU cache of rendered text keyed by (font, text, antialias, color), so labels
+    # and HUD values are only rasterized when they change. Returned surfaces are
+    # shared: blit them, never draw on them.
+
+    def __init__(self, max_size: int = TEXT_CACHE_SIZE) -> None:
+        self.max_size = max_size
+        self._surfaces: "OrderedDict[tuple, pygame.Surface]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font: pygame.font.Font, text: str, antialias: bool, color) -> pygame.Surface:
+        if not isinstance(color, tuple):
+            color = tuple(color)
+        key = (font, text, antialias, color)
+        surf = self._surfaces.get(key)
+        if surf is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surf
+        self.misses += 1
+        surf = font.render(text, antialias, color)
+        self._surfaces[key] = surf
+        if len(self._surfaces) > self.max_size:
+            self._surfaces.popitem(last=False)
+        return surf
+
+    def clear(self) -> None:
+        self._surfaces.clear()
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._surfaces),
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+# Shared by the HUD, screens and widgets
+text_cache = TextCache()
 
 
 def draw_panel(surface: pygame.Surface, rect: pygame.Rect, bg: Tuple[int, int, int], border: Tuple[int, int, int] | None = None, radius: int = 12, border_width: int = 2):
@@ -9,6 +55,9 @@ def draw_panel(surface: pygame.Surface, rect: pygame.Rect, bg: Tuple[int, int, i
 
 
 class Button:
+    # Space left of the button used by the focus indicator triangle
+    INDICATOR_W = 14
+
     def __init__(self, rect: pygame.Rect, text: str, font: pygame.font.Font, on_click: Callable[[], None],
                  color_bg=(30, 30, 50), color_fg=(240, 240, 240), color_hover=(50, 50, 80)) -> None:
         self.rect = rect
@@ -19,29 +68,55 @@ class Button:
         self.color_fg = color_fg
         self.color_hover = color_hover
         self.hovered = False
+        # Pre-rendered looks keyed by (highlighted, focused); dirty until drawn
+        self._surfaces: Dict[Tuple[bool, bool], pygame.Surface] = {}
+        self.dirty = True
+
+    def invalidate(self) -> None:
+        # Call after changing text, font, colors or rect
+        self._surfaces.clear()
+        self.dirty = True
 
     def handle_event(self, event: pygame.event.Event) -> None:
         if event.type == pygame.MOUSEMOTION:
-            self.hovered = self.rect.collidepoint(event.pos)
+            hovered = self.rect.collidepoint(event.pos)
+            if hovered != self.hovered:
+                self.hovered = hovered
+                self.dirty = True
         elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
             if self.rect.collidepoint(event.pos):
                 self.on_click()
 
-    def draw(self, surface: pygame.Surface, focused: bool = False) -> None:
-        bg = self.color_hover if (self.hovered or focused) else self.color_bg
+    def _render(self, highlighted: bool, focused: bool) -> pygame.Surface:
+        surf = pygame.Surface((self.rect.w + self.INDICATOR_W, self.rect.h), pygame.SRCALPHA)
+        rect = pygame.Rect(self.INDICATOR_W, 0, self.rect.w, self.rect.h)
+        bg = self.color_hover if highlighted else self.color_bg
         border_color = (140, 140, 200) if focused else (90, 90, 130)
-        draw_panel(surface, self.rect, bg, border=border_color)
-        label = self.font.render(self.text, True, self.color_fg)
-        surface.blit(label, label.get_rect(center=self.rect.center))
+        draw_panel(surf, rect, bg, border=border_color)
+        label = text_cache.render(self.font, self.text, True, self.color_fg)
+        surf.blit(label, label.get_rect(center=rect.center))
         if focused:
             # draw a small triangle indicator on the left
-            tip_y = self.rect.centery
-            x0 = self.rect.left - 14
+            tip_y = rect.centery
+            x0 = 0
             points = [(x0 + 10, tip_y), (x0 + 2, tip_y - 6), (x0 + 2, tip_y + 6)]
-            pygame.draw.polygon(surface, border_color, points)
+            pygame.draw.polygon(surf, border_color, points)
+        return surf
+
+    def draw(self, surface: pygame.Surface, focused: bool = False, origin: Tuple[int, int] = (0, 0)) -> None:
+        # origin: screen position of `surface`, for drawing into pre-composed panels
+        key = (self.hovered or focused, focused)
+        surf = self._surfaces.get(key)
+        if surf is None:
+            surf = self._surfaces[key] = self._render(*key)
+        surface.blit(surf, (self.rect.x - self.INDICATOR_W - origin[0], self.rect.y - origin[1]))
+        self.dirty = False
 
 
 class Slider:
+    # Horizontal room for the knob, which overhangs the track at both ends
+    KNOB_OVERHANG = 8
+
     def __init__(self, rect: pygame.Rect, value: float, on_change: Callable[[float], None],
                  track_color=(60, 60, 90), fill_color=(120, 180, 255), knob_color=(240, 240, 240)) -> None:
         self.rect = rect
@@ -51,6 +126,21 @@ class Slider:
         self.fill_color = fill_color
         self.knob_color = knob_color
         self.dragging = False
+        self._surface = None
+        self._surface_key = None
+        self.dirty = True
+
+    def invalidate(self) -> None:
+        # Call after changing colors or rect
+        self._surface = None
+        self.dirty = True
+
+    def set_value(self, value: float) -> None:
+        # Update the displayed value without firing on_change (e.g. keyboard changes)
+        value = max(0.0, min(1.0, value))
+        if value != self.value:
+            self.value = value
+            self.dirty = True
 
     def handle_event(self, event: pygame.event.Event) -> None:
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
@@ -65,22 +155,32 @@ class Slider:
     def _update_value_from_pos(self, x: int) -> None:
         left, width = self.rect.x, self.rect.w
         t = (x - left) / max(1, width)
-        self.value = max(0.0, min(1.0, t))
+        self.set_value(t)
         self.on_change(self.value)
 
-    def draw(self, surface: pygame.Surface, focused: bool = False) -> None:
+    def _render(self, focused: bool) -> pygame.Surface:
+        pad = self.KNOB_OVERHANG
+        surf = pygame.Surface((self.rect.w + 2 * pad, self.rect.h), pygame.SRCALPHA)
+        rect = pygame.Rect(pad, 0, self.rect.w, self.rect.h)
         # Track
-        track_rect = pygame.Rect(self.rect.x, self.rect.y + self.rect.h // 2 - 4, self.rect.w, 8)
-        pygame.draw.rect(surface, self.track_color, track_rect, border_radius=4)
+        track_rect = pygame.Rect(rect.x, rect.y + rect.h // 2 - 4, rect.w, 8)
+        pygame.draw.rect(surf, self.track_color, track_rect, border_radius=4)
         # Fill
         fill_rect = track_rect.copy()
-        fill_rect.w = int(self.value * self.rect.w)
-        pygame.draw.rect(surface, self.fill_color, fill_rect, border_radius=4)
+        fill_rect.w = int(self.value * rect.w)
+        pygame.draw.rect(surf, self.fill_color, fill_rect, border_radius=4)
         # Knob
-        knob_x = self.rect.x + int(self.value * self.rect.w)
-        knob_rect = pygame.Rect(knob_x - 8, self.rect.y + self.rect.h // 2 - 12, 16, 24)
-        pygame.draw.rect(surface, self.knob_color, knob_rect, border_radius=6)
+        knob_x = rect.x + int(self.value * rect.w)
+        knob_rect = pygame.Rect(knob_x - 8, rect.y + rect.h // 2 - 12, 16, 24)
+        pygame.draw.rect(surf, self.knob_color, knob_rect, border_radius=6)
         if focused:
-            pygame.draw.rect(surface, (140, 140, 200), self.rect, width=2, border_radius=8)
-
+            pygame.draw.rect(surf, (140, 140, 200), rect, width=2, border_radius=8)
+        return surf
 
+    def draw(self, surface: pygame.Surface, focused: bool = False, origin: Tuple[int, int] = (0, 0)) -> None:
+        key = (self.value, focused)
+        if self._surface is None or self._surface_key != key:
+            self._surface = self._render(focused)
+            self._surface_key = key
+        surface.blit(self._surface, (self.rect.x - self.KNOB_OVERHANG - origin[0], self.rect.y - origin[1]))
+        self.dirty = False
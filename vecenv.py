@@ -0,0 +1,320 @@
+from __future__ import annotations
+from typing import Dict, Optional, Sequence, Tuple
+import pygame
+from settings import (
+    SCREEN_WIDTH,
+    SCREEN_HEIGHT,
+    SIM_HZ,
+    PLAYER_SPEED,
+    PLAYER_SHOOT_COOLDOWN_MS,
+    BULLET_SPEED,
+    ENEMY_BULLET_SPEED,
+    ENEMY_COLS,
+    ENEMY_ROWS,
+    ENEMY_X_PADDING,
+    ENEMY_Y_PADDING,
+    ENEMY_START_Y,
+    ENEMY_HMOVE_PIXELS,
+    ENEMY_VMOVE_PIXELS,
+    DIFFICULTY_PRESETS,
+)
+from assets_loader import Assets, build_masks
+from soa import np, _require_numpy
+
+# Batched, display-free version of the Simulation rules: N independent games are
+# stepped together from an action array. Every alive enemy of a formation moves in
+# lockstep, so a formation is stored as a per-env origin offset plus an alive grid.
+# Sprite sizes and collision masks are taken from the game's images
+# (Assets.load_images, as in Simulation.headless) once, when the environment is
+# built. Hits are pixel-exact like Simulation's: the rect test finds candidates,
+# and a table of mask overlaps per bullet offset, filled once, confirms them.
+#
+# Differences from Simulation: bullets live in fixed-size slot tables per env
+# (extra enemy shots are dropped when full), ties between bullets resolve by slot
+# rather than list order, and the enemy shooting rolls come from a per-env,
+# per-column counter-based generator (splitmix64) instead of random.Random.
+
+# Action bits (combine with |)
+ACTION_LEFT = 1
+ACTION_RIGHT = 2
+ACTION_FIRE = 4
+NUM_ACTIONS = 8
+
+PLAYER_BULLET_SLOTS = 8
+ENEMY_BULLET_SLOTS = 64
+# Nearest enemy bullets reported in the observation
+OBS_BULLETS = 8
+
+_GOLDEN = 0x9E3779B97F4A7C15
+
+
+def _mix64(z: "np.ndarray") -> "np.ndarray":
+    z = z ^ (z >> np.uint64(30))
+    z *= np.uint64(0xBF58476D1CE4E5B9)
+    z ^= z >> np.uint64(27)
+    z *= np.uint64(0x94D049BB133111EB)
+    z ^= z >> np.uint64(31)
+    return z
+
+
+def _overlap_table(mask: pygame.mask.Mask, bullet_mask: pygame.mask.Mask) -> "np.ndarray":
+    # table[dy + bh - 1, dx + bw - 1]: whether the bullet mask at offset (dx, dy)
+    # from `mask` overlaps it, for every offset at which their rects overlap
+    w, h = mask.get_size()
+    bw, bh = bullet_mask.get_size()
+    table = np.zeros((h + bh - 1, w + bw - 1), bool)
+    for dy in range(1 - bh, h):
+        for dx in range(1 - bw, w):
+            table[dy + bh - 1, dx + bw - 1] = mask.overlap(bullet_mask, (dx, dy)) is not None
+    return table
+
+
+def _splitmix64(state: "np.ndarray") -> "np.ndarray":
+    # Advances state in place and returns uniforms in [0, 1) of the same shape
+    state += np.uint64(_GOLDEN)
+    return (_mix64(state) >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+
+
+class VecEnv:
+    def __init__(self, num_envs: int, difficulty: str = "Normal", seed: int = 0,
+                 images: Optional[Dict[str, pygame.Surface]] = None,
+                 masks: Optional[Dict[str, pygame.mask.Mask]] = None) -> None:
+        _require_numpy()
+        self.num_envs = num_envs
+        self.difficulty = difficulty
+        if images is None:
+            assets = Assets()
+            assets.load_images()
+            images, masks = assets.images, assets.masks
+        if masks is None:
+            masks = build_masks(images)
+        self.pw, self.ph = images["player"].get_size()
+        self.ew, self.eh = images["enemy"].get_size()
+        self.pbw, self.pbh = images["bullet"].get_size()
+        self.ebw, self.ebh = images["enemy_bullet"].get_size()
+        # A bullet can then overlap at most one grid column and one grid row
+        if self.pbw + self.ew > ENEMY_X_PADDING or self.pbh + self.eh > ENEMY_Y_PADDING:
+            raise ValueError("Sprite sizes too large for the formation grid spacing")
+        self.enemy_hits = _overlap_table(masks["enemy"], masks["bullet"])
+        self.player_hits = _overlap_table(masks["player"], masks["enemy_bullet"])
+
+        n, rows, cols = num_envs, ENEMY_ROWS, ENEMY_COLS
+        self.rows, self.cols = rows, cols
+        self.grid_x = (ENEMY_X_PADDING + np.arange(cols) * ENEMY_X_PADDING).astype(np.int32)
+        self.grid_y = (ENEMY_START_Y + np.arange(rows) * ENEMY_Y_PADDING).astype(np.int32)
+        self.player_y = SCREEN_HEIGHT - 20 - self.ph
+
+        self.tick = np.zeros(n, np.int64)
+        self.score = np.zeros(n, np.int64)
+        self.level = np.ones(n, np.int32)
+        self.player_x = np.zeros(n, np.int32)
+        self.last_shot = np.zeros(n, np.int64)
+        self.alive = np.zeros((n, rows, cols), bool)
+        self.origin_x = np.zeros(n, np.int32)
+        self.origin_y = np.zeros(n, np.int32)
+        self.direction = np.ones(n, np.int32)
+        self.last_move = np.zeros(n, np.int64)
+        self.move_interval = np.zeros(n, np.int64)
+        self.shoot_chance = np.zeros(n, np.float64)
+        self.pb_x = np.zeros((n, PLAYER_BULLET_SLOTS), np.int32)
+        self.pb_y = np.zeros((n, PLAYER_BULLET_SLOTS), np.int32)
+        self.pb_alive = np.zeros((n, PLAYER_BULLET_SLOTS), bool)
+        self.eb_x = np.zeros((n, ENEMY_BULLET_SLOTS), np.int32)
+        self.eb_y = np.zeros((n, ENEMY_BULLET_SLOTS), np.int32)
+        self.eb_alive = np.zeros((n, ENEMY_BULLET_SLOTS), bool)
+        self.rng_state = np.zeros((n, cols), np.uint64)
+        self.seeds = np.arange(seed, seed + n, dtype=np.int64)
+        self._episodes = np.zeros(n, np.int64)
+        self.reset()
+
+    @property
+    def obs_size(self) -> int:
+        return 4 + self.rows * self.cols + 3 * OBS_BULLETS
+
+    def reset(self, seeds: Optional[Sequence[int]] = None) -> "np.ndarray":
+        if seeds is not None:
+            self.seeds = np.asarray(seeds, dtype=np.int64)
+        self._episodes[:] = 0
+        self._reset_envs(np.arange(self.num_envs))
+        return self.observe()
+
+    def _reset_envs(self, idx: "np.ndarray") -> None:
+        # Same semantics as Simulation.reset(): level 1, score 0, fresh formation
+        self.tick[idx] = 0
+        self.score[idx] = 0
+        self.level[idx] = 1
+        self.player_x[idx] = SCREEN_WIDTH // 2 - self.pw // 2
+        self.last_shot[idx] = -PLAYER_SHOOT_COOLDOWN_MS
+        self.pb_alive[idx] = False
+        self.eb_alive[idx] = False
+        # Episode k of env i gets its own stream; column c is a disjoint substream
+        base = _mix64((self.seeds[idx].astype(np.uint64) << np.uint64(20)) + self._episodes[idx].astype(np.uint64))
+        cols = np.arange(self.cols, dtype=np.uint64) << np.uint64(40)
+        self.rng_state[idx] = base[:, None] + cols[None, :]
+        self._spawn_formation(idx)
+
+    def _spawn_formation(self, idx: "np.ndarray") -> None:
+        self.alive[idx] = True
+        self.origin_x[idx] = 0
+        self.origin_y[idx] = 0
+        self.direction[idx] = 1
+        self.last_move[idx] = 0
+        preset = DIFFICULTY_PRESETS.get(self.difficulty, DIFFICULTY_PRESETS["Normal"])
+        lvl = self.level[idx] - 1
+        # Level scaling as in Simulation.apply_difficulty
+        interval = (preset["enemy_move_interval_ms"] * (0.94 ** lvl)).astype(np.int64)
+        self.move_interval[idx] = np.where(lvl > 0, np.maximum(100, interval), preset["enemy_move_interval_ms"])
+        self.shoot_chance[idx] = preset["enemy_shoot_chance"] * (1.06 ** lvl)
+
+    def step(self, actions: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray", "np.ndarray", Dict[str, "np.ndarray"]]:
+        actions = np.asarray(actions)
+        n = self.num_envs
+        envs = np.arange(n)
+        self.tick += 1
+        now = self.tick * 1000 // SIM_HZ
+        score_before = self.score.copy()
+
+        # Player
+        move = ((actions & ACTION_RIGHT) > 0).astype(np.int32) - ((actions & ACTION_LEFT) > 0).astype(np.int32)
+        np.clip(self.player_x + move * PLAYER_SPEED, 0, SCREEN_WIDTH - self.pw, out=self.player_x)
+        free = ~self.pb_alive
+        fire = ((actions & ACTION_FIRE) > 0) & (now - self.last_shot >= PLAYER_SHOOT_COOLDOWN_MS) & free.any(axis=1)
+        if fire.any():
+            fe = envs[fire]
+            slot = free[fe].argmax(axis=1)
+            self.pb_x[fe, slot] = self.player_x[fe] + self.pw // 2 - self.pbw // 2
+            self.pb_y[fe, slot] = self.player_y - self.pbh
+            self.pb_alive[fe, slot] = True
+            self.last_shot[fe] = now[fe]
+
+        self._update_formation(now)
+
+        # Bullets
+        self.pb_y += BULLET_SPEED
+        self.pb_alive &= (self.pb_y + self.pbh >= 0) & (self.pb_y <= SCREEN_HEIGHT)
+        self.eb_y += ENEMY_BULLET_SPEED
+        self.eb_alive &= (self.eb_y + self.ebh >= 0) & (self.eb_y <= SCREEN_HEIGHT)
+
+        self._collide_enemies()
+        done = self._collide_player()
+
+        # Lowest alive row reaching the danger line ends the game
+        any_alive = self.alive.any(axis=(1, 2))
+        lowest = self.rows - 1 - self.alive.any(axis=2)[:, ::-1].argmax(axis=1)
+        bottom = self.grid_y[lowest] + self.origin_y + self.eh
+        done |= any_alive & (bottom >= SCREEN_HEIGHT - 60)
+
+        cleared = ~any_alive & ~done
+        if cleared.any():
+            ce = envs[cleared]
+            self.level[ce] += 1
+            self._spawn_formation(ce)
+
+        reward = (self.score - score_before).astype(np.float32)
+        info = {"score": self.score.copy(), "level": self.level.copy(), "frames": self.tick.copy()}
+        if done.any():
+            de = envs[done]
+            self._episodes[de] += 1
+            self._reset_envs(de)
+        return self.observe(), reward, done, info
+
+    def _update_formation(self, now: "np.ndarray") -> None:
+        alive_cols = self.alive.any(axis=1)
+        has = alive_cols.any(axis=1)
+        moving = (now - self.last_move >= self.move_interval) & has
+        self.last_move = np.where(now - self.last_move >= self.move_interval, now, self.last_move)
+        if moving.any():
+            big = np.int32(1 << 30)
+            min_x = np.where(alive_cols, self.grid_x, big).min(axis=1) + self.origin_x
+            max_x = np.where(alive_cols, self.grid_x, -big).max(axis=1) + self.origin_x + self.ew
+            d = self.direction
+            edge = ((d > 0) & (max_x + ENEMY_HMOVE_PIXELS >= SCREEN_WIDTH - 10)) | ((d < 0) & (min_x - ENEMY_HMOVE_PIXELS <= 10))
+            drop = moving & edge
+            side = moving & ~edge
+            self.origin_y += np.where(drop, ENEMY_VMOVE_PIXELS, 0).astype(np.int32)
+            self.direction = np.where(drop, -d, d)
+            self.origin_x += np.where(side, ENEMY_HMOVE_PIXELS * d, 0).astype(np.int32)
+
+        # Bottom-most enemy of every non-empty column may shoot
+        rolls = _splitmix64(self.rng_state)
+        shoot = alive_cols & (rolls < self.shoot_chance[:, None])
+        if not shoot.any():
+            return
+        bottom_row = self.rows - 1 - self.alive[:, ::-1, :].argmax(axis=1)
+        # Pair the k-th shooter of an env with its k-th free slot
+        rank = np.cumsum(shoot, axis=1) - 1
+        free = ~self.eb_alive
+        free_rank = np.cumsum(free, axis=1) - 1
+        fe, fs = np.nonzero(free & (free_rank < self.cols))
+        slot_of = np.full((self.num_envs, self.cols), -1, np.int64)
+        slot_of[fe, free_rank[fe, fs]] = fs
+        se, sc = np.nonzero(shoot)
+        slots = slot_of[se, rank[se, sc]]
+        ok = slots >= 0
+        se, sc, slots = se[ok], sc[ok], slots[ok]
+        self.eb_x[se, slots] = self.grid_x[sc] + self.origin_x[se] + self.ew // 2 - self.ebw // 2
+        self.eb_y[se, slots] = self.grid_y[bottom_row[se, sc]] + self.origin_y[se] + self.eh
+        self.eb_alive[se, slots] = True
+
+    def _collide_enemies(self) -> None:
+        be, bs = np.nonzero(self.pb_alive)
+        if be.size == 0:
+            return
+        bx, by = self.pb_x[be, bs], self.pb_y[be, bs]
+        x0 = ENEMY_X_PADDING + self.origin_x[be]
+        y0 = ENEMY_START_Y + self.origin_y[be]
+        # Only candidate cell: the last column/row starting before the bullet's far edge
+        col = (bx + self.pbw - 1 - x0) // ENEMY_X_PADDING
+        row = (by + self.pbh - 1 - y0) // ENEMY_Y_PADDING
+        ok = (col >= 0) & (col < self.cols) & (row >= 0) & (row < self.rows)
+        dx = bx - (x0 + col * ENEMY_X_PADDING)
+        dy = by - (y0 + row * ENEMY_Y_PADDING)
+        ok &= (dx < self.ew) & (dy < self.eh)
+        be, bs, row, col, dx, dy = be[ok], bs[ok], row[ok], col[ok], dx[ok], dy[ok]
+        ok = self.alive[be, row, col] & self.enemy_hits[dy + self.pbh - 1, dx + self.pbw - 1]
+        be, bs, row, col = be[ok], bs[ok], row[ok], col[ok]
+        if be.size == 0:
+            return
+        # One kill per enemy: the lowest slot wins, the other bullets fly on
+        key = (be * self.rows + row) * self.cols + col
+        _, first = np.unique(key, return_index=True)
+        be, bs, row, col = be[first], bs[first], row[first], col[first]
+        self.alive[be, row, col] = False
+        self.pb_alive[be, bs] = False
+        np.add.at(self.score, be, 100)
+
+    def _collide_player(self) -> "np.ndarray":
+        px = self.player_x[:, None]
+        near = (
+            self.eb_alive
+            & (self.eb_x < px + self.pw) & (self.eb_x + self.ebw > px)
+            & (self.eb_y < self.player_y + self.ph) & (self.eb_y + self.ebh > self.player_y)
+        )
+        he, hs = np.nonzero(near)
+        dx = self.eb_x[he, hs] - self.player_x[he]
+        dy = self.eb_y[he, hs] - self.player_y
+        hit = np.zeros(self.num_envs, bool)
+        hit[he[self.player_hits[dy + self.ebh - 1, dx + self.ebw - 1]]] = True
+        return hit
+
+    def observe(self) -> "np.ndarray":
+        n = self.num_envs
+        obs = np.zeros((n, self.obs_size), np.float32)
+        obs[:, 0] = self.player_x / SCREEN_WIDTH
+        obs[:, 1] = self.origin_x / SCREEN_WIDTH
+        obs[:, 2] = self.origin_y / SCREEN_HEIGHT
+        obs[:, 3] = self.direction
+        e = 4 + self.rows * self.cols
+        obs[:, 4:e] = self.alive.reshape(n, -1)
+        # Lowest (most threatening) enemy bullets first, relative to the player
+        key = np.where(self.eb_alive, self.eb_y, -(1 << 30))
+        nearest = np.argsort(-key, axis=1, kind="stable")[:, :OBS_BULLETS]
+        rows = np.arange(n)[:, None]
+        present = self.eb_alive[rows, nearest]
+        dx = (self.eb_x[rows, nearest] - self.player_x[:, None]) / SCREEN_WIDTH
+        dy = (self.player_y - self.eb_y[rows, nearest]) / SCREEN_HEIGHT
+        bullets = obs[:, e:].reshape(n, OBS_BULLETS, 3)
+        bullets[..., 0] = np.where(present, dx, 0.0)
+        bullets[..., 1] = np.where(present, dy, 0.0)
+        bullets[..., 2] = present
+        return obs